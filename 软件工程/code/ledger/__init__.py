@@ -2,12 +2,22 @@
 
 __all__ = [
     "database",
+    "fileio",
     "models",
     "repositories",
     "services",
     "stats",
+    "vectorized",
+    "advisor",
     "cli",
+    "output",
+    "server",
+    "client",
+    "commands",
     "utils",
+    "worker",
+    "record_window",
+    "bench",
 ]
 
 
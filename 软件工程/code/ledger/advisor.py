@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .database import db_read_cursor
+from .repositories import RecordRepository, StatsRepository
+
+
+@dataclass
+class QueryPlan:
+    name: str
+    sql: str
+    plan: List[str]
+    warnings: List[str] = field(default_factory=list)
+
+
+def representative_queries() -> List[Tuple[str, str, Sequence[Any]]]:
+    """The query shapes issued by the repositories, with sample parameters."""
+    start, end = date(2025, 10, 1), date(2025, 10, 31)
+    records = RecordRepository
+    shapes = [
+        ("list_recent", records.search_query(limit=20)),
+        ("list_recent_page", records.page_query(page_size=20, after="date:2025-10-15:1000")),
+        ("search_date_range", records.search_query(start=start, end=end, limit=100)),
+        (
+            "search_amount_range",
+            records.search_query(min_amount=10, max_amount=100, order_by="amount_asc", limit=100),
+        ),
+        (
+            "search_amount_page",
+            records.page_query(min_amount=10, order_by="amount_desc", after="amount:5000:1000"),
+        ),
+        ("search_keyword", records.search_query(keyword="星巴克咖啡", limit=100)),
+        ("search_category", records.search_query(category_id=1, limit=100)),
+        ("search_method", records.search_query(payment_method_id=1, limit=100)),
+        ("budget_progress", StatsRepository.monthly_category_totals_query("2025-10", "expense")),
+        ("export_resume", records.export_query(start=start, end=end, since_id=1000)),
+    ]
+    for dimension in ("date", "category", "method"):
+        shapes.append((f"stats_by_{dimension}", StatsRepository.totals_query(dimension, start, end)))
+    return [(name, sql, params) for name, (sql, params) in shapes]
+
+
+def _warnings(plan: List[str]) -> List[str]:
+    warnings = []
+    for detail in plan:
+        words = detail.split()
+        # "SCAN records" with no index is a full table scan.
+        if words[:1] == ["SCAN"] and "USING" not in words and "VIRTUAL" not in words:
+            warnings.append(f"full scan: {detail}")
+        if "TEMP B-TREE" in detail:
+            warnings.append(f"temp b-tree: {detail}")
+    return warnings
+
+
+def explain_queries(db_path: Optional[str] = None) -> List[QueryPlan]:
+    """Run EXPLAIN QUERY PLAN for every representative query and flag problems."""
+    reports = []
+    with db_read_cursor(db_path) as cur:
+        for name, sql, params in representative_queries():
+            cur.execute(f"EXPLAIN QUERY PLAN {sql}", list(params))
+            plan = [row["detail"] for row in cur.fetchall()]
+            reports.append(QueryPlan(name=name, sql=" ".join(sql.split()), plan=plan, warnings=_warnings(plan)))
+    return reports
@@ -3,24 +3,44 @@ from __future__ import annotations
 import tkinter as tk
 from tkinter import messagebox, ttk
 from datetime import date
-from typing import Optional
+from typing import Any, Callable, List, Optional, Set, Tuple
 
-from .database import migrate
+from .database import close_all, enable_profiling_from_env, migrate
+from .models import BudgetProgress, Category, Record
+from .record_window import RecordWindow, WindowRequest, fetch_window
 from .services import BudgetService, CategoryService, RecordService
+from .worker import BackgroundWorker
 
 
 class LedgerApp(tk.Tk):
-    def __init__(self) -> None:
+    PAGE_SIZE = 200
+    POLL_MS = 40
+    SHUTDOWN_TIMEOUT = 2.0
+
+    def __init__(self, db_profile: Optional[str] = None) -> None:
         super().__init__()
         self.title("次元记账 - 桌面版(基础)")
         self.geometry("820x560")
         self.resizable(True, True)
 
-        migrate()
+        migrate(profile=db_profile)
 
         self.record_service = RecordService()
         self.category_service = CategoryService()
         self.budget_service = BudgetService()
+        # Service calls run on this worker so the window keeps repainting.
+        self.worker = BackgroundWorker()
+
+        # Records page state; see _build_list_page().
+        self._window = RecordWindow(self.record_service, fetch_size=self.PAGE_SIZE)
+        self._window_fetch: Optional[WindowRequest] = None  # the fetch in flight, if any
+        self._top = 0
+        self._visible = 0
+        self._selected_ids: Set[int] = set()
+        self._applied_selection: Tuple[str, ...] = ()
+
+        self.var_status = tk.StringVar()
+        ttk.Label(self, textvariable=self.var_status, anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X, padx=6)
 
         notebook = ttk.Notebook(self)
         notebook.pack(fill=tk.BOTH, expand=True)
@@ -39,6 +59,49 @@ class LedgerApp(tk.Tk):
         self._build_list_page(self.page_list)
         self._build_budget_page(self.page_budget)
         self._build_category_page(self.page_categories)
+        self._poll_worker()
+
+    def destroy(self) -> None:
+        # Cancelled reads are interrupted, so the worker normally stops at once;
+        # a connection still in use after the timeout is left to process exit.
+        stopped = self.worker.shutdown(timeout=self.SHUTDOWN_TIMEOUT)
+        super().destroy()
+        if stopped:
+            close_all()
+
+    def _poll_worker(self) -> None:
+        self.worker.poll()
+        self.var_status.set("正在处理…" if self.worker.busy else "")
+        self.after(self.POLL_MS, self._poll_worker)
+
+    def _submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        key: Optional[str] = None,
+        interruptible: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """Run ``fn`` on the worker; callbacks come back on the Tk thread.
+
+        Reads pass a ``key`` so repeated requests coalesce to the latest one.
+        Errors are shown in a message box unless ``on_error`` is given.
+        """
+        self.worker.submit(
+            fn,
+            *args,
+            key=key,
+            interruptible=interruptible,
+            on_success=on_success,
+            on_error=on_error or self._show_error,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _show_error(exc: BaseException) -> None:
+        messagebox.showerror("错误", str(exc))
 
     # --- Add Record Page ---
     def _build_add_page(self, parent: ttk.Frame) -> None:
@@ -94,15 +157,36 @@ class LedgerApp(tk.Tk):
             method = self.var_method.get().strip() or "WeChat"
             category = self.var_category.get().strip() or None
             note = self.var_note.get().strip()
-            self.record_service.add_record(
-                type_=type_, amount=amount, date_=date_, payment_method=method, category=category, note=note
-            )
-            messagebox.showinfo("成功", "记录已添加")
-            self._refresh_list()
         except Exception as exc:  # noqa: BLE001 - 简化 GUI 示例
             messagebox.showerror("错误", str(exc))
+            return
+
+        def add() -> Tuple[Record, int]:
+            record = self.record_service.add_record(
+                type_=type_,
+                amount=amount,
+                date_=date_,
+                payment_method=method,
+                category=category,
+                note=note,
+            )
+            return record, self.record_service.position_of(record)
+
+        def done(result: Tuple[Record, int]) -> None:
+            record, position = result
+            self._window.insert(position, record)
+            self._render()
+            messagebox.showinfo("成功", "记录已添加")
+
+        self._submit(add, on_success=done)
 
     # --- Records Page ---
+    # The list is virtual: the Treeview only holds one item per visible row,
+    # and _render() rewrites their values from a RecordWindow that fetches the
+    # records around the viewport on the worker thread as the user scrolls.
+    ROW_HEIGHT = 20
+    ROW_BUFFER = 100
+
     def _build_list_page(self, parent: ttk.Frame) -> None:
         toolbar = ttk.Frame(parent)
         toolbar.pack(fill=tk.X)
@@ -110,8 +194,14 @@ class LedgerApp(tk.Tk):
         btn_refresh.pack(side=tk.LEFT, padx=6, pady=6)
         btn_delete = ttk.Button(toolbar, text="删除选中", command=self._on_delete_selected)
         btn_delete.pack(side=tk.LEFT, padx=6, pady=6)
-
-        self.tree = ttk.Treeview(parent, columns=("id", "type", "amount", "date", "method", "category", "note"), show="headings")
+        self.var_record_count = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.var_record_count).pack(side=tk.RIGHT, padx=6, pady=6)
+
+        body = ttk.Frame(parent)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.list_scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self._on_yscroll)
+        self.list_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = ttk.Treeview(body, columns=("id", "type", "amount", "date", "method", "category", "note"), show="headings")
         for col, text in (
             ("id", "ID"),
             ("type", "类型"),
@@ -123,33 +213,140 @@ class LedgerApp(tk.Tk):
         ):
             self.tree.heading(col, text=text)
             self.tree.column(col, width=100, stretch=True)
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", self._on_list_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_list_select)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_list_wheel)
+        self.tree.bind("<Prior>", lambda _e: self._scroll_by(-self._visible) or "break")
+        self.tree.bind("<Next>", lambda _e: self._scroll_by(self._visible) or "break")
 
         self._refresh_list()
 
     def _refresh_list(self) -> None:
-        for i in self.tree.get_children():
-            self.tree.delete(i)
-        rows = self.record_service.list_recent(limit=200)
-        for r in rows:
-            self.tree.insert("", tk.END, values=(r.id, r.type, r.amount, r.date.isoformat(), r.payment_method_id, r.category_id, r.note))
+        self._submit(self.record_service.count_records, key="count", on_success=self._on_list_count)
+
+    def _on_list_count(self, total: int) -> None:
+        self._window.reset(total)
+        self._render()
+
+    def _on_list_resize(self, _event: Any = None) -> None:
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or self.ROW_HEIGHT)
+        visible = max(1, self.tree.winfo_height() // rowheight - 1)  # minus the heading
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _render(self) -> None:
+        window = self._window
+        total = window.total
+        self._top = max(0, min(self._top, total - self._visible))
+        items = []
+        selection = []
+        for i in range(self._visible):
+            iid = f"r{i}"
+            index = self._top + i
+            if index >= total:
+                if self.tree.exists(iid):
+                    self.tree.delete(iid)
+                continue
+            r = window.get(index)
+            if r is None:
+                values: Tuple[Any, ...] = ("…",) + ("",) * 6
+            else:
+                values = (r.id, r.type, r.amount, r.date.isoformat(), r.payment_method_id, r.category_id, r.note)
+                if r.id in self._selected_ids:
+                    selection.append(iid)
+            if self.tree.exists(iid):
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", tk.END, iid=iid, values=values)
+            items.append(iid)
+        for iid in self.tree.get_children():
+            if iid not in items:
+                self.tree.delete(iid)
+        self._applied_selection = tuple(selection)
+        self.tree.selection_set(selection)
+
+        if total:
+            self.list_scroll.set(self._top / total, min(1.0, (self._top + self._visible) / total))
+        else:
+            self.list_scroll.set(0.0, 1.0)
+        self.var_record_count.set(f"共 {total} 条")
+
+        plan = window.plan(self._top - self.ROW_BUFFER, self._top + self._visible + self.ROW_BUFFER)
+        if plan is not None and plan != self._window_fetch:
+            # Only a different missing range replaces (and interrupts) the fetch in flight.
+            self._window_fetch = plan
+            self._submit(
+                fetch_window,
+                self.record_service,
+                plan,
+                key="window",
+                interruptible=True,
+                on_success=lambda records: self._on_window_fetched(plan, records),
+                on_error=lambda exc: self._on_window_fetched(plan, None, exc),
+            )
+
+    def _on_window_fetched(
+        self, plan: WindowRequest, records: Optional[List[Record]], exc: Optional[BaseException] = None
+    ) -> None:
+        if self._window_fetch == plan:
+            self._window_fetch = None
+        if exc is not None:
+            self._show_error(exc)
+        elif self._window.apply(plan, records):
+            self._render()
+
+    def _scroll_to(self, top: int) -> None:
+        top = max(0, min(top, self._window.total - self._visible))
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _scroll_by(self, rows: int) -> None:
+        self._scroll_to(self._top + rows)
+
+    def _on_yscroll(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self._scroll_to(int(float(amount) * self._window.total))
+        elif action == "scroll":
+            step = self._visible if unit == "pages" else 1
+            self._scroll_by(int(amount) * step)
+
+    def _on_list_wheel(self, event: Any) -> str:
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_by(-3)
+        else:
+            self._scroll_by(3)
+        return "break"
+
+    def _on_list_select(self, _event: Any = None) -> None:
+        selection = self.tree.selection()
+        if selection == self._applied_selection:
+            return  # echo of the selection _render() restored
+        self._applied_selection = selection
+        shown = {r.id for r in map(self._window.get, range(self._top, self._top + self._visible)) if r is not None}
+        picked = {int(self.tree.item(iid, "values")[0]) for iid in selection if self.tree.item(iid, "values")[0] != "…"}
+        # Rows scrolled out of view stay selected.
+        self._selected_ids = picked | (self._selected_ids - shown)
 
     def _on_delete_selected(self) -> None:
-        sel = self.tree.selection()
-        if not sel:
+        record_ids = sorted(self._selected_ids)
+        if not record_ids:
             messagebox.showinfo("提示", "请先选择要删除的记录")
             return
-        if not messagebox.askyesno("确认", f"确定删除选中的 {len(sel)} 条记录吗？"):
+        if not messagebox.askyesno("确认", f"确定删除选中的 {len(record_ids)} 条记录吗？"):
             return
-        try:
-            for item in sel:
-                vals = self.tree.item(item, "values")
-                record_id = int(vals[0])
-                self.record_service.delete_record(record_id)
-            self._refresh_list()
+
+        def done(_count: int) -> None:
+            self._window.remove(record_ids)
+            self._selected_ids.clear()
+            self._render()
             messagebox.showinfo("成功", "已删除选中记录")
-        except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("错误", str(exc))
+
+        self._submit(self.record_service.delete_records, record_ids, on_success=done)
 
     # --- Budget Page ---
     def _build_budget_page(self, parent: ttk.Frame) -> None:
@@ -190,33 +387,40 @@ class LedgerApp(tk.Tk):
             month = self.var_month.get().strip()
             total = float(self.var_total.get())
             threshold = float(self.var_threshold.get())
-            self.budget_service.set_budget(month, total, threshold)
-            messagebox.showinfo("成功", "预算已设置")
         except Exception as exc:  # noqa: BLE001 - 简化 GUI 示例
             messagebox.showerror("错误", str(exc))
+            return
+        self._submit(
+            self.budget_service.set_budget,
+            month,
+            total,
+            threshold,
+            on_success=lambda _budget: messagebox.showinfo("成功", "预算已设置"),
+        )
 
     def _on_budget_progress(self) -> None:
-        try:
-            month = self.var_month.get().strip()
-            p = self.budget_service.progress(month)
-            lines = [
-                f"月份: {p.month}",
-                f"总预算: {p.total_budget}",
-                f"已用: {p.total_expense}",
-                f"使用率: {p.usage_ratio:.2%}",
-                f"阈值: {p.threshold:.0%}",
-                "",
-                "分类预算:",
-            ]
-            for name, budget, used in p.by_category:
-                lines.append(f"- {name}: 预算 {budget} / 已用 {used}")
-            if p.total_budget > 0 and p.usage_ratio >= p.threshold:
-                lines.append("")
-                lines.append("[预警] 已达到预算阈值！")
-            self.text_progress.delete("1.0", tk.END)
-            self.text_progress.insert(tk.END, "\n".join(lines))
-        except Exception as exc:  # noqa: BLE001 - 简化 GUI 示例
-            messagebox.showerror("错误", str(exc))
+        month = self.var_month.get().strip()
+        self._submit(
+            self.budget_service.progress, month, key="budget-progress", interruptible=True, on_success=self._show_progress
+        )
+
+    def _show_progress(self, p: BudgetProgress) -> None:
+        lines = [
+            f"月份: {p.month}",
+            f"总预算: {p.total_budget}",
+            f"已用: {p.total_expense}",
+            f"使用率: {p.usage_ratio:.2%}",
+            f"阈值: {p.threshold:.0%}",
+            "",
+            "分类预算:",
+        ]
+        for name, budget, used in p.by_category:
+            lines.append(f"- {name}: 预算 {budget} / 已用 {used}")
+        if p.total_budget > 0 and p.usage_ratio >= p.threshold:
+            lines.append("")
+            lines.append("[预警] 已达到预算阈值！")
+        self.text_progress.delete("1.0", tk.END)
+        self.text_progress.insert(tk.END, "\n".join(lines))
 
     # --- Category Page ---
     def _build_category_page(self, parent: ttk.Frame) -> None:
@@ -239,8 +443,10 @@ class LedgerApp(tk.Tk):
         self._refresh_categories()
 
     def _refresh_categories(self) -> None:
+        self._submit(self.category_service.list, key="categories", on_success=self._show_categories)
+
+    def _show_categories(self, cats: List[Category]) -> None:
         self.listbox_categories.delete(0, tk.END)
-        cats = self.category_service.list()
         for c in cats:
             self.listbox_categories.insert(tk.END, f"{c.id}:{c.name}")
 
@@ -249,13 +455,13 @@ class LedgerApp(tk.Tk):
         if not name:
             messagebox.showinfo("提示", "请输入分类名称")
             return
-        try:
-            self.category_service.add(name)
+
+        def done(_category: Category) -> None:
             self.var_new_category.set("")
             self._refresh_categories()
             messagebox.showinfo("成功", "分类已添加")
-        except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("错误", str(exc))
+
+        self._submit(self.category_service.add, name, on_success=done)
 
     def _on_delete_category(self) -> None:
         sel = self.listbox_categories.curselection()
@@ -263,18 +469,19 @@ class LedgerApp(tk.Tk):
             messagebox.showinfo("提示", "请先选择要删除的分类")
             return
         item = self.listbox_categories.get(sel[0])
-        try:
-            cid = int(item.split(":", 1)[0])
-            if not messagebox.askyesno("确认", f"确定删除分类 {item}? 相关记录将显示为未分类。"):
-                return
-            self.category_service.delete(cid)
+        cid = int(item.split(":", 1)[0])
+        if not messagebox.askyesno("确认", f"确定删除分类 {item}? 相关记录将显示为未分类。"):
+            return
+
+        def done(_: None) -> None:
             self._refresh_categories()
             messagebox.showinfo("成功", "分类已删除")
-        except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("错误", str(exc))
+
+        self._submit(self.category_service.delete, cid, on_success=done)
 
 
 def main() -> None:
+    enable_profiling_from_env()
     app = LedgerApp()
     app.mainloop()
 
@@ -0,0 +1,5 @@
+"""Reproducible performance benchmarks for the ledger data layer.
+
+Run ``python -m ledger.bench --help``; results are written as JSON so runs
+from different versions can be compared.
+"""
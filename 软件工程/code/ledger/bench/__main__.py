@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Optional, Tuple
+
+import click
+
+from ..database import PROFILES
+from .runner import SCALES, environment, run_scale
+
+
+@click.command()
+@click.option("--scale", "scales", type=click.Choice(list(SCALES)), multiple=True, help="可重复；默认 10k")
+@click.option("--rows", type=click.IntRange(min=1), default=None, help="自定义记录数（覆盖 --scale）")
+@click.option("--months", type=click.IntRange(min=1), default=12, show_default=True)
+@click.option("--seed", type=int, default=42, show_default=True)
+@click.option("--repeat", type=click.IntRange(min=1), default=5, show_default=True)
+@click.option("--db-profile", type=click.Choice(list(PROFILES)), default="balanced", show_default=True)
+@click.option("--out", type=click.Path(dir_okay=False), default=None, help="JSON 输出文件，默认 stdout")
+@click.option("--keep-db", is_flag=True, help="保留生成的数据库")
+def main(
+    scales: Tuple[str, ...],
+    rows: Optional[int],
+    months: int,
+    seed: int,
+    repeat: int,
+    db_profile: str,
+    out: Optional[str],
+    keep_db: bool,
+) -> None:
+    """次元记账数据层基准测试（合成数据，结果为 JSON）"""
+    sizes = [rows] if rows else [SCALES[s] for s in (scales or ("10k",))]
+    workdir = tempfile.mkdtemp(prefix="ledger-bench-")
+    report = {"environment": environment(), "runs": []}
+    try:
+        for size in sizes:
+            db_path = os.path.join(workdir, f"bench-{size}.sqlite3")
+            click.echo(f"running {size} rows -> {db_path}", err=True)
+            report["runs"].append(
+                run_scale(db_path, size, months=months, seed=seed, repeat=repeat, profile=db_profile)
+            )
+    finally:
+        if keep_db:
+            click.echo(f"databases kept in {workdir}", err=True)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if out:
+        with open(out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# (name, weight, median amount in yuan, note templates)
+EXPENSE_CATEGORIES: Sequence[Tuple[Optional[str], float, float, Sequence[str]]] = (
+    ("餐饮", 0.34, 28.0, ("早餐", "午餐 食堂", "晚餐 外卖", "奶茶", "咖啡 星巴克", "聚餐")),
+    ("交通", 0.16, 12.0, ("地铁", "公交", "打车 滴滴", "加油", "高铁票")),
+    ("购物", 0.14, 89.0, ("超市购物", "淘宝 日用品", "京东 数码", "衣服", "书籍")),
+    ("娱乐", 0.08, 60.0, ("电影票", "游戏充值", "KTV", "演唱会门票")),
+    ("住房", 0.04, 1500.0, ("房租", "水电费", "物业费", "宽带")),
+    ("医疗", 0.03, 120.0, ("药店", "门诊挂号", "体检")),
+    ("教育", 0.04, 200.0, ("网课", "教材", "考试报名费")),
+    (None, 0.17, 35.0, ("转账", "红包", "其他支出", "")),
+)
+INCOME_CATEGORIES: Sequence[Tuple[Optional[str], float, float, Sequence[str]]] = (
+    ("工资", 0.6, 8000.0, ("工资", "绩效奖金")),
+    ("理财", 0.25, 150.0, ("基金收益", "余额宝收益", "利息")),
+    (None, 0.15, 200.0, ("红包", "退款", "兼职收入")),
+)
+METHODS: Sequence[Tuple[str, float]] = (
+    ("WeChat", 0.45),
+    ("Alipay", 0.35),
+    ("Cash", 0.08),
+    ("Card", 0.12),
+)
+INCOME_RATIO = 0.08
+
+
+def _month_start(start: date, offset: int) -> date:
+    month_index = start.month - 1 + offset
+    return date(start.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def generate_rows(
+    n: int, months: int = 12, seed: int = 42, start: date = date(2023, 1, 1)
+) -> Iterator[Dict[str, Any]]:
+    """Yield ``n`` import rows (fileio.IMPORT_FIELDS) spread evenly over ``months``.
+
+    The same arguments always produce the same rows, in date order.
+    """
+    rng = random.Random(seed)
+    expense_weights = [c[1] for c in EXPENSE_CATEGORIES]
+    income_weights = [c[1] for c in INCOME_CATEGORIES]
+    method_names = [m[0] for m in METHODS]
+    method_weights = [m[1] for m in METHODS]
+    end = _month_start(start, months)
+    span_days = (end - start).days
+    for i in range(n):
+        day = start + timedelta(days=i * span_days // n)
+        if rng.random() < INCOME_RATIO:
+            type_ = "income"
+            category, _, median, notes = rng.choices(INCOME_CATEGORIES, income_weights)[0]
+        else:
+            type_ = "expense"
+            category, _, median, notes = rng.choices(EXPENSE_CATEGORIES, expense_weights)[0]
+        # Log-normal amounts around the category median, rounded to 分.
+        amount = round(median * rng.lognormvariate(0.0, 0.6), 2) or 0.01
+        note = rng.choice(notes)
+        if note and rng.random() < 0.3:
+            note = f"{note} #{rng.randint(1, 999)}"
+        yield {
+            "type": type_,
+            "amount": amount,
+            "date": day.isoformat(),
+            "method": rng.choices(method_names, method_weights)[0],
+            "category": category or "",
+            "note": note,
+        }
+
+
+def months_covered(months: int, start: date = date(2023, 1, 1)) -> List[str]:
+    return [_month_start(start, i).strftime("%Y-%m") for i in range(months)]
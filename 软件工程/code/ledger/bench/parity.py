@@ -0,0 +1,112 @@
+"""Parity check between the SQL and NumPy stats engines.
+
+Loads a deterministic synthetic ledger (or uses ``--db``), then runs every
+StatsService summary over the full range and a set of random sub-ranges
+with both engines and requires identical StatsResult objects.
+
+    python -m ledger.bench.parity --rows 20000
+    python -m ledger.bench.parity --db ledger.sqlite3
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+import click
+
+from .. import database, vectorized
+from ..services import RecordService
+from ..stats import StatsService
+from ..utils import TIME_BUCKETS
+from .generator import generate_rows
+
+SUMMARIES = {
+    **{
+        f"stats_by_time[{g}]": (lambda svc, a, b, g=g: svc.stats_by_time(a, b, granularity=g))
+        for g in TIME_BUCKETS
+    },
+    "stats_by_category": lambda svc, a, b: svc.stats_by_category(a, b),
+    "stats_by_method": lambda svc, a, b: svc.stats_by_method(a, b),
+}
+
+
+def date_ranges(start: date, end: date, count: int, seed: int) -> List[Tuple[date, date]]:
+    """The full range, an empty range before it, and ``count`` random sub-ranges."""
+    rng = random.Random(seed)
+    span = (end - start).days
+    ranges = [(start, end), (start - timedelta(days=30), start - timedelta(days=1))]
+    for _ in range(count):
+        a = start + timedelta(days=rng.randint(0, span))
+        b = a + timedelta(days=rng.randint(0, max(0, (end - a).days)))
+        ranges.append((a, b))
+    return ranges
+
+
+def check_parity(ranges: List[Tuple[date, date]]) -> List[str]:
+    """Describe every summary where the engines disagree; empty when they match."""
+    sql, vec = StatsService("sql"), StatsService("numpy")
+    failures = []
+    for start, end in ranges:
+        for name, summary in SUMMARIES.items():
+            expected = summary(sql, start, end)
+            actual = summary(vec, start, end)
+            if expected != actual:
+                failures.append(f"{name} {start}..{end}: sql={expected} numpy={actual}")
+    return failures
+
+
+def _data_range(db_path: Optional[str]) -> Tuple[date, date]:
+    with database.db_read_cursor(db_path) as cur:
+        cur.execute("SELECT MIN(date), MAX(date) FROM records")
+        lo, hi = cur.fetchone()
+    if lo is None:
+        return date.today(), date.today()
+    return date.fromisoformat(lo), date.fromisoformat(hi)
+
+
+@click.command()
+@click.option("--db", "db_path", type=click.Path(exists=True, dir_okay=False), default=None, help="使用已有数据库，而不是生成合成数据")
+@click.option("--rows", type=click.IntRange(min=0), default=20000, show_default=True, help="合成数据记录数")
+@click.option("--months", type=click.IntRange(min=1), default=24, show_default=True)
+@click.option("--seed", type=int, default=42, show_default=True)
+@click.option("--ranges", "range_count", type=click.IntRange(min=0), default=20, show_default=True, help="随机日期区间数")
+def main(db_path: Optional[str], rows: int, months: int, seed: int, range_count: int) -> None:
+    """对比 SQL 与 NumPy 统计引擎的结果是否完全一致"""
+    if not vectorized.HAS_NUMPY:
+        click.echo("NumPy 未安装，跳过一致性检查", err=True)
+        sys.exit(2)
+    workdir = None
+    if db_path is None:
+        workdir = tempfile.mkdtemp(prefix="ledger-parity-")
+        db_path = os.path.join(workdir, "parity.sqlite3")
+    try:
+        database.set_default_db_path(db_path)
+        database.migrate()
+        if workdir is not None:
+            RecordService().import_records(generate_rows(rows, months, seed), batch_size=10_000)
+        start, end = _data_range(None)
+        if workdir is not None:
+            click.echo(f"generated {rows} rows over {months} months", err=True)
+        ranges = date_ranges(start, end, range_count, seed)
+        failures = check_parity(ranges)
+    finally:
+        database.close_all()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    for failure in failures:
+        click.echo(failure)
+    checked = len(ranges) * len(SUMMARIES)
+    if failures:
+        click.echo(f"{len(failures)}/{checked} 项不一致", err=True)
+        sys.exit(1)
+    click.echo(f"{checked} 项统计结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .. import database
+from ..repositories import RecordRepository
+from ..services import BudgetService, RecordService
+from ..stats import StatsService
+from .generator import generate_rows, months_covered
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def measure(name: str, fn: Callable[[], Any], repeat: int = 5, **extra: Any) -> Dict[str, Any]:
+    """Time ``fn`` ``repeat`` times; report per-call wall-clock statistics in ms."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "name": name,
+        "repeat": repeat,
+        "mean_ms": statistics.fmean(samples),
+        "min_ms": samples[0],
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        **extra,
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def run_scale(
+    db_path: str,
+    rows: int,
+    months: int = 12,
+    seed: int = 42,
+    repeat: int = 5,
+    profile: str = database.DEFAULT_PROFILE,
+) -> Dict[str, Any]:
+    """Load ``rows`` synthetic records into a fresh database and time the data layer."""
+    database.close_all()
+    database.set_default_db_path(db_path)
+    database.migrate(profile=profile)
+    records = RecordService()
+    repo = RecordRepository()
+    stats = StatsService()
+    budgets = BudgetService()
+    results: List[Dict[str, Any]] = []
+
+    t0 = time.perf_counter()
+    imported = records.import_records(generate_rows(rows, months, seed), batch_size=10_000)
+    elapsed = time.perf_counter() - t0
+    results.append(
+        {
+            "name": "import",
+            "repeat": 1,
+            "mean_ms": elapsed * 1000,
+            "rows": imported,
+            "rows_per_s": imported / elapsed if elapsed else None,
+        }
+    )
+
+    month_list = months_covered(months)
+    first = date.fromisoformat(month_list[0] + "-01")
+    mid = date.fromisoformat(month_list[len(month_list) // 2] + "-01")
+    last = date.fromisoformat(month_list[-1] + "-28")
+    for month in month_list[:3]:
+        budgets.set_budget(month, 3000, 0.8)
+        budgets.set_category_budget(month, "餐饮", 1000)
+
+    create_n = 200
+    results.append(
+        measure(
+            "record_create",
+            lambda: repo.create("expense", 12.5, mid, 1, None, "bench"),
+            repeat=create_n,
+        )
+    )
+    results.append(measure("list_recent", lambda: repo.list_recent(limit=20), repeat))
+    deep = repo.search_page(page_size=20, order_by="date_asc")
+    results.append(
+        measure(
+            "list_recent_page_deep",
+            lambda: repo.search_page(page_size=20, after=deep.next_token, order_by="date_asc"),
+            repeat,
+        )
+    )
+    searches = {
+        "search_month": dict(start=mid, end=mid.replace(day=28)),
+        "search_amount_range": dict(min_amount=100, max_amount=120, order_by="amount_asc"),
+        "search_keyword": dict(keyword="星巴克"),
+        "search_keyword_short": dict(keyword="午餐"),
+        "search_category": dict(category_id=1),
+    }
+    for name, filters in searches.items():
+        results.append(measure(name, lambda f=filters: repo.search(limit=100, **f), repeat))
+    results.append(
+        measure("iter_search_all", lambda: sum(1 for _ in repo.iter_search()), max(1, repeat // 5))
+    )
+    results.append(measure("stats_by_time", lambda: stats.stats_by_time(first, last), repeat))
+    results.append(measure("stats_by_category", lambda: stats.stats_by_category(first, last), repeat))
+    results.append(measure("stats_by_method", lambda: stats.stats_by_method(first, last), repeat))
+    results.append(measure("budget_progress", lambda: budgets.progress(month_list[0]), repeat))
+    database.close_all()
+    return {
+        "rows": rows,
+        "months": months,
+        "seed": seed,
+        "profile": profile,
+        "db_size_bytes": os.path.getsize(db_path),
+        "results": results,
+    }
@@ -0,0 +1,104 @@
+"""CLI cold-start benchmark based on ``python -X importtime``.
+
+Each command is resolved in a fresh interpreter. Its import cost is the self
+time of every module it loads beyond what ``import click`` already loads, so
+the number tracks what the ledger package adds rather than interpreter or
+click start-up. The run fails when a command exceeds the budget.
+
+    python -m ledger.bench.startup
+    python -m ledger.bench.startup --command add-record --budget-ms 20
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import click
+
+from ..cli import COMMANDS
+from .runner import environment
+
+DEFAULT_BUDGET_MS = 30.0
+_BASELINE = "import click"
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _run(args: List[str]) -> Tuple[float, str]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_PACKAGE_ROOT, os.environ.get("PYTHONPATH")])))
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *args], cwd=_PACKAGE_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return (time.perf_counter() - t0) * 1000, proc.stderr
+
+
+def import_times(code: str) -> Dict[str, float]:
+    """Self import time in ms of every module loaded while running ``code``."""
+    _, stderr = _run(["-X", "importtime", "-c", code])
+    times: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, _, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        times[name] = int(self_us) / 1000
+    return times
+
+
+def measure_command(name: str, repeat: int = 5) -> Dict[str, Any]:
+    code = f"from ledger.cli import cli; cli.get_command(None, {name!r})"
+    baseline = set(import_times(_BASELINE))
+    runs = [import_times(code) for _ in range(repeat)]
+    extra = [{m: t for m, t in run.items() if m not in baseline} for run in runs]
+    totals = sorted(sum(run.values()) for run in extra)
+    last = extra[-1]
+    # `<command> --help` skips migrate(), so this never touches the user's database.
+    wall = sorted(_run(["-m", "ledger.cli", name, "--help"])[0] for _ in range(repeat))
+    return {
+        "command": name,
+        "import_ms": statistics.median(totals),
+        "wall_ms": statistics.median(wall),
+        "slowest_modules": sorted(last.items(), key=lambda item: item[1], reverse=True)[:8],
+        "modules": sorted(m for m in last if m.startswith("ledger") or "." not in m),
+    }
+
+
+@click.command()
+@click.option("--command", "commands", type=click.Choice(sorted(COMMANDS)), multiple=True, help="可重复；默认全部命令")
+@click.option("--repeat", type=click.IntRange(min=1), default=5, show_default=True)
+@click.option("--budget-ms", type=click.FloatRange(min=0), default=DEFAULT_BUDGET_MS, show_default=True)
+@click.option("--out", type=click.Path(dir_okay=False), default=None, help="JSON 输出文件，默认 stdout")
+def main(commands: Tuple[str, ...], repeat: int, budget_ms: float, out: Optional[str]) -> None:
+    """CLI 冷启动基准：统计各命令在 import click 之外新增的导入耗时"""
+    baseline_wall = sorted(_run(["-c", _BASELINE])[0] for _ in range(repeat))
+    report: Dict[str, Any] = {
+        "environment": environment(),
+        "budget_ms": budget_ms,
+        "baseline_wall_ms": statistics.median(baseline_wall),
+        "commands": [],
+    }
+    over = []
+    for name in commands or sorted(COMMANDS):
+        result = measure_command(name, repeat=repeat)
+        click.echo(f"{name}: import {result['import_ms']:.1f}ms, wall {result['wall_ms']:.1f}ms", err=True)
+        report["commands"].append(result)
+        if result["import_ms"] > budget_ms:
+            over.append(name)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if out:
+        with open(out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    if over:
+        click.echo(f"超出启动预算 {budget_ms}ms：{', '.join(over)}", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,195 +1,168 @@
 from __future__ import annotations
 
+import importlib
 import sys
-from datetime import date
-from typing import Optional
+from typing import Dict, List, Optional
 
 import click
-from tabulate import tabulate
 
-from .database import migrate
-from .services import BudgetService, CategoryService, RecordService
-from .stats import StatsService
-from .utils import parse_date
-
-
-@click.group()
-def cli() -> None:
+from .database import PROFILES, close_all, enable_profiling, get_profiler, migrate
+
+# Command name -> "module:attribute" under ledger.commands. A command module
+# (and whatever it needs: services, repositories, tabulate) is imported only
+# when that command runs, which keeps shell-loop invocations cheap.
+COMMANDS: Dict[str, str] = {
+    "add-category": "categories:add_category",
+    "list-categories": "categories:list_categories",
+    "add-record": "records:add_record",
+    "update-record": "records:update_record",
+    "delete-record": "records:delete_record",
+    "list-records": "browse:list_records",
+    "search": "browse:search",
+    "import": "transfer:import_records",
+    "export": "transfer:export_records",
+    "rebuild-search-index": "maintenance:rebuild_search_index_cmd",
+    "rebuild-rollups": "maintenance:rebuild_rollups_cmd",
+    "explain": "maintenance:explain",
+    "set-budget": "budgets:set_budget",
+    "set-category-budget": "budgets:set_category_budget",
+    "budget-progress": "budgets:budget_progress",
+    "stats": "stats:stats",
+    "serve": "server:serve",
+}
+# Commands that never go through --server: they read or write files given
+# relative to the caller's directory, or are the server itself.
+LOCAL_COMMANDS = frozenset(("import", "export", "serve"))
+# Commands that only read; the server runs them on its reader pool.
+READ_ONLY_COMMANDS = frozenset(("list-categories", "list-records", "search", "explain", "budget-progress", "stats"))
+
+
+class LazyGroup(click.Group):
+    """click.Group that resolves subcommands from ``COMMANDS`` on demand."""
+
+    def __init__(self, *args, lazy_commands: Optional[Dict[str, str]] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attr = self.lazy_commands[cmd_name].split(":")
+            module = importlib.import_module(f"{__package__}.commands.{module_name}")
+            self.add_command(getattr(module, attr), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def invoke(self, ctx: click.Context):
+        address = ctx.params.get("server_address")
+        args = [*ctx.protected_args, *ctx.args]
+        # Subcommand help needs no database; the group callback checks this.
+        ctx.meta["ledger.help"] = any(arg in ctx.help_option_names for arg in args[1:])
+        if address and not _served(ctx) and args and args[0] not in LOCAL_COMMANDS and not ctx.meta["ledger.help"]:
+            # Hand the command line to the running server; nothing is imported
+            # or opened here beyond the client.
+            from .client import ServerError, run_cli
+
+            try:
+                code = run_cli(address, args, ctx.params["output_format"])
+            except ServerError as exc:
+                raise click.ClickException(f"服务端错误：{exc.message}") from exc
+            except OSError as exc:
+                raise click.ClickException(f"无法连接服务 {address}：{exc}") from exc
+            sys.exit(code)
+        return super().invoke(ctx)
+
+
+def _served(ctx: click.Context) -> bool:
+    """Whether this run is a command executed inside ``ledger serve``."""
+    return isinstance(ctx.obj, dict) and bool(ctx.obj.get("served"))
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option(
+    "--db-profile",
+    type=click.Choice(list(PROFILES)),
+    envvar="LEDGER_DB_PROFILE",
+    default=None,
+    help="SQLite 性能配置（safe/balanced/bulk），默认 balanced",
+)
+@click.option("--profile", "profile_queries", is_flag=True, envvar="LEDGER_PROFILE", help="统计每条 SQL 的耗时，退出时输出到 stderr")
+@click.option(
+    "--slow-query-ms",
+    type=click.FloatRange(min=0),
+    envvar="LEDGER_SLOW_QUERY_MS",
+    default=None,
+    help="慢查询阈值（毫秒），超过即写入慢查询日志；单独使用时输出到 stderr",
+)
+@click.option(
+    "--slow-query-log",
+    type=click.Path(dir_okay=False),
+    envvar="LEDGER_SLOW_QUERY_LOG",
+    default=None,
+    help="慢查询日志文件（- 为 stderr）",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "csv", "json", "ndjson"]),  # output.OUTPUT_FORMATS, not imported at start-up
+    envvar="LEDGER_FORMAT",
+    default="table",
+    show_default=True,
+    help="查询结果输出格式；csv/json/ndjson 逐行流式输出，列名固定（list-records、search、stats、list-categories）",
+)
+@click.option(
+    "--server",
+    "server_address",
+    envvar="LEDGER_SERVER",
+    default=None,
+    help="经由运行中的 ledger serve 执行命令：unix:路径、tcp:主机:端口，或 auto（默认地址）",
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    db_profile: Optional[str],
+    profile_queries: bool,
+    slow_query_ms: Optional[float],
+    slow_query_log: Optional[str],
+    output_format: str,
+    server_address: Optional[str],
+) -> None:
     """次元记账 - 命令行版"""
-    migrate()
-
-
-@cli.command("add-category")
-@click.argument("name")
-def add_category(name: str) -> None:
-    svc = CategoryService()
-    c = svc.add(name)
-    click.echo(f"分类已添加：{c.name} (id={c.id})")
-
-
-@cli.command("list-categories")
-def list_categories() -> None:
-    svc = CategoryService()
-    categories = svc.list()
-    click.echo(tabulate([(c.id, c.name) for c in categories], headers=["ID", "名称"]))
-
+    if _served(ctx):
+        return  # the server has migrated and owns the connections
+    if ctx.meta.get("ledger.help"):
+        return  # `<command> --help` must not create or upgrade the database
+    if profile_queries or slow_query_log or slow_query_ms is not None:
+        # A threshold without a log file reports slow statements on stderr.
+        if slow_query_ms is not None and not slow_query_log:
+            slow_query_log = "-"
+        enable_profiling(slow_ms=100.0 if slow_query_ms is None else slow_query_ms, slow_log=slow_query_log)
+        if profile_queries:
+            ctx.call_on_close(_echo_profile)
+    migrate(profile=db_profile)
+    ctx.call_on_close(close_all)
+
+
+def _echo_profile(top: int = 15) -> None:
+    profiler = get_profiler()
+    if profiler is None:
+        return
+    from tabulate import tabulate
 
-@cli.command("add-record")
-@click.option("--type", "type_", type=click.Choice(["income", "expense"]), required=True)
-@click.option("--amount", type=float, required=True)
-@click.option("--date", "date_str", type=str, required=True)
-@click.option("--method", "payment_method", type=str, required=True)
-@click.option("--category", type=str, default=None)
-@click.option("--note", type=str, default="")
-def add_record(
-    type_: str, amount: float, date_str: str, payment_method: str, category: Optional[str], note: str
-) -> None:
-    svc = RecordService()
-    r = svc.add_record(
-        type_=type_, amount=amount, date_=parse_date(date_str), payment_method=payment_method, category=category, note=note
-    )
-    click.echo(f"记录已添加：id={r.id}, {r.type}, {r.amount}, {r.date}")
-
-
-@cli.command("list-records")
-@click.option("--limit", type=int, default=20)
-def list_records(limit: int) -> None:
-    svc = RecordService()
-    rows = svc.list_recent(limit=limit)
-    table = [
-        (r.id, r.type, r.amount, r.date.isoformat(), r.payment_method_id, r.category_id, r.note)
-        for r in rows
-    ]
-    click.echo(tabulate(table, headers=["ID", "类型", "金额", "日期", "支付方式ID", "分类ID", "备注"]))
-
-
-@cli.command("update-record")
-@click.argument("record_id", type=int)
-@click.option("--type", "type_", type=click.Choice(["income", "expense"]))
-@click.option("--amount", type=float)
-@click.option("--date", "date_str", type=str)
-@click.option("--method", "payment_method", type=str)
-@click.option("--category", type=str)
-@click.option("--note", type=str)
-def update_record(
-    record_id: int,
-    type_: Optional[str],
-    amount: Optional[float],
-    date_str: Optional[str],
-    payment_method: Optional[str],
-    category: Optional[str],
-    note: Optional[str],
-) -> None:
-    svc = RecordService()
-    svc.update_record(
-        record_id,
-        type_=type_,
-        amount=amount,
-        date_=parse_date(date_str) if date_str else None,
-        payment_method=payment_method,
-        category=category if category is not None else None,
-        note=note,
-    )
-    click.echo("记录已更新")
-
-
-@cli.command("delete-record")
-@click.argument("record_id", type=int)
-def delete_record(record_id: int) -> None:
-    svc = RecordService()
-    svc.delete_record(record_id)
-    click.echo("记录已删除")
-
-
-@cli.command("search")
-@click.option("--min", "min_amount", type=float)
-@click.option("--max", "max_amount", type=float)
-@click.option("--start", type=str)
-@click.option("--end", type=str)
-@click.option("--keyword", type=str)
-@click.option("--type", "type_", type=click.Choice(["income", "expense"]))
-def search(min_amount: Optional[float], max_amount: Optional[float], start: Optional[str], end: Optional[str], keyword: Optional[str], type_: Optional[str]) -> None:
-    from .repositories import RecordRepository
-
-    repo = RecordRepository()
-    rows = repo.search(
-        min_amount=min_amount,
-        max_amount=max_amount,
-        start=parse_date(start) if start else None,
-        end=parse_date(end) if end else None,
-        keyword=keyword,
-        type_=type_,
-        limit=200,
-    )
     table = [
-        (r.id, r.type, r.amount, r.date.isoformat(), r.payment_method_id, r.category_id, r.note)
-        for r in rows
-    ]
-    click.echo(tabulate(table, headers=["ID", "类型", "金额", "日期", "支付方式ID", "分类ID", "备注"]))
-
-
-@cli.command("set-budget")
-@click.option("--month", type=str, required=True)
-@click.option("--total", type=float, required=True)
-@click.option("--threshold", type=float, default=0.8, show_default=True)
-def set_budget(month: str, total: float, threshold: float) -> None:
-    bs = BudgetService()
-    b = bs.set_budget(month, total, threshold)
-    click.echo(f"预算已更新：{b.month} 总额={b.total} 阈值={b.threshold}")
-
-
-@cli.command("set-category-budget")
-@click.option("--month", type=str, required=True)
-@click.option("--category", type=str, required=True)
-@click.option("--amount", type=float, required=True)
-def set_category_budget(month: str, category: str, amount: float) -> None:
-    bs = BudgetService()
-    bs.set_category_budget(month, category, amount)
-    click.echo("分类预算已设置")
-
-
-@cli.command("budget-progress")
-@click.option("--month", type=str, required=True)
-def budget_progress(month: str) -> None:
-    bs = BudgetService()
-    p = bs.progress(month)
-    click.echo(
-        tabulate(
-            [
-                (p.month, p.total_budget, p.total_expense, f"{p.usage_ratio:.2%}", f"{p.threshold:.0%}")
-            ],
-            headers=["月份", "总预算", "已用", "使用率", "阈值"],
-        )
-    )
-    if p.total_budget > 0 and p.usage_ratio >= p.threshold:
-        click.echo("[预警] 已达到预算阈值！")
-    if p.by_category:
-        click.echo("\n分类预算：")
-        click.echo(tabulate([(n, b, u) for (n, b, u) in p.by_category], headers=["分类", "预算", "已用"]))
-
-
-@cli.command("stats")
-@click.option("--dimension", type=click.Choice(["time", "category", "method"]), required=True)
-@click.option("--start", type=str, required=True)
-@click.option("--end", type=str, required=True)
-def stats(dimension: str, start: str, end: str) -> None:
-    ss = StatsService()
-    start_d = parse_date(start)
-    end_d = parse_date(end)
-    if dimension == "time":
-        res = ss.stats_by_time(start_d, end_d)
-    elif dimension == "category":
-        res = ss.stats_by_category(start_d, end_d)
-    else:
-        res = ss.stats_by_method(start_d, end_d)
-    click.echo(tabulate(res.items, headers=["项", "金额(支出正/收入负)"]))
-    click.echo(
-        tabulate(
-            [(res.total_income, res.total_expense)], headers=["总收入", "总支出"], tablefmt="simple"
+        (
+            e["sql"] if len(e["sql"]) <= 80 else e["sql"][:77] + "...",
+            e["count"],
+            f"{e['total_ms']:.2f}",
+            f"{e['p50_ms']:.2f}",
+            f"{e['p95_ms']:.2f}",
+            e["rows"],
         )
-    )
+        for e in profiler.summary()[:top]
+    ]
+    click.echo(tabulate(table, headers=["语句", "次数", "总耗时ms", "p50", "p95", "行数"]), err=True)
 
 
 if __name__ == "__main__":
-    cli(standalone_mode=False)
-
+    cli()
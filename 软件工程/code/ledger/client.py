@@ -0,0 +1,137 @@
+"""Thin client for ``ledger serve`` (see ledger/server.py for the protocol).
+
+It only needs the standard library's socket and json, so scripts that talk
+to a running server skip the service and repository imports entirely::
+
+    with LedgerClient() as client:
+        client.call("records.add_record", type_="expense", amount=12.5, date_="2025-10-01",
+                    payment_method="Cash", category="餐饮", note="")
+        page = client.call("records.list_page", page_size=20)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+from typing import Any, Optional, Sequence, Tuple, Union
+
+DEFAULT_TCP_PORT = 8765
+
+
+class ServerError(RuntimeError):
+    """An error raised by the server while handling a request."""
+
+    def __init__(self, type_: str, message: str) -> None:
+        super().__init__(f"{type_}: {message}")
+        self.type = type_
+        self.message = message
+
+
+def default_address() -> str:
+    """A Unix socket next to the default database, or a localhost TCP port."""
+    if hasattr(socket, "AF_UNIX") and os.name != "nt":
+        from .database import DEFAULT_DB_PATH
+
+        return "unix:" + os.path.abspath(DEFAULT_DB_PATH) + ".sock"
+    return f"tcp:127.0.0.1:{DEFAULT_TCP_PORT}"
+
+
+def token_path() -> str:
+    """Where a TCP server writes its access token (readable by the current user only)."""
+    from .database import DEFAULT_DB_PATH
+
+    return os.path.abspath(DEFAULT_DB_PATH) + ".server-token"
+
+
+def read_token() -> Optional[str]:
+    token = os.environ.get("LEDGER_SERVER_TOKEN")
+    if token:
+        return token
+    try:
+        with open(token_path(), "r", encoding="utf-8") as fh:
+            return fh.read().strip() or None
+    except OSError:
+        return None
+
+
+def parse_address(address: Optional[str]) -> Tuple[str, Union[str, Tuple[str, int]]]:
+    """``unix:PATH``, ``tcp:HOST:PORT``, ``HOST:PORT`` or a socket path; None or "auto" for the default."""
+    if not address or address == "auto":
+        address = default_address()
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:") :]
+    if address.startswith("tcp:"):
+        address = address[len("tcp:") :]
+    elif os.sep in address or address.endswith(".sock"):
+        return "unix", address
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid server address: {address!r}")
+    return "tcp", (host, int(port))
+
+
+class LedgerClient:
+    def __init__(
+        self, address: Optional[str] = None, timeout: Optional[float] = 60.0, token: Optional[str] = None
+    ) -> None:
+        family, target = parse_address(address)
+        # TCP servers require their token; Unix sockets rely on file permissions.
+        self._token = (token or read_token()) if family == "tcp" else None
+        if family == "unix":
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            try:
+                self._sock.connect(target)
+            except OSError:
+                self._sock.close()
+                raise
+        else:
+            self._sock = socket.create_connection(target, timeout=timeout)
+        self._file = self._sock.makefile("rwb")
+        self._next_id = 0
+
+    def call(self, method: str, *args: Any, **params: Any) -> Any:
+        """Run ``method`` on the server; dates may be passed as date objects."""
+        self._next_id += 1
+        request = {"id": self._next_id, "method": method, "args": list(args), "params": params}
+        if self._token is not None:
+            request["token"] = self._token
+        line = json.dumps(request, ensure_ascii=False, separators=(",", ":"), default=_iso)
+        self._file.write(line.encode("utf-8") + b"\n")
+        self._file.flush()
+        reply = self._file.readline()
+        if not reply:
+            raise ConnectionError("Server closed the connection")
+        response = json.loads(reply)
+        if "error" in response:
+            error = response["error"]
+            raise ServerError(error.get("type", "Error"), error.get("message", ""))
+        return response.get("result")
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "LedgerClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _iso(value: Any) -> str:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def run_cli(address: Optional[str], args: Sequence[str], output_format: str = "table") -> int:
+    """Run a CLI command line on the server, echo its output here, return its exit code."""
+    with LedgerClient(address, timeout=None) as client:
+        result = client.call("cli.run", args=list(args), format=output_format)
+    sys.stdout.write(result["stdout"])
+    sys.stdout.flush()
+    sys.stderr.write(result["stderr"])
+    return result["exit_code"]
@@ -0,0 +1 @@
+"""CLI command modules, imported lazily by ``ledger.cli`` for the command being run."""
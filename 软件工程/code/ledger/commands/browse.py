@@ -0,0 +1,105 @@
+"""Record listing commands: list-records, search."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+import click
+
+from ..models import Record, RecordPage
+from ..output import current_format, echo, emit
+from ..repositories import CategoryRepository, PaymentMethodRepository, RecordRepository
+from ..services import RecordService
+from ..utils import parse_date
+
+RECORD_COLUMNS = ("id", "type", "amount", "date", "method", "category", "note")
+RECORD_HEADERS = ("ID", "类型", "金额", "日期", "支付方式", "分类", "备注")
+
+
+def _record_rows(records: Iterable[Record]) -> Iterator[Tuple[Any, ...]]:
+    methods = PaymentMethodRepository().names_by_id()
+    categories = CategoryRepository().names_by_id()
+    for r in records:
+        yield (
+            r.id,
+            r.type,
+            r.amount,
+            r.date.isoformat(),
+            methods.get(r.payment_method_id),
+            categories.get(r.category_id),
+            r.note,
+        )
+
+
+def _echo_records(records: Iterable[Record]) -> None:
+    emit(RECORD_COLUMNS, _record_rows(records), headers=RECORD_HEADERS)
+
+
+def _echo_page(page: RecordPage) -> None:
+    _echo_records(page.records)
+    # Keep machine-readable stdout clean; tokens go to stderr there.
+    err = current_format() != "table"
+    if page.prev_token:
+        echo(f"上一页：--before {page.prev_token}", err=err)
+    if page.next_token:
+        echo(f"下一页：--after {page.next_token}", err=err)
+
+
+@click.command("list-records")
+@click.option("--limit", type=click.IntRange(min=0), default=20, show_default=True, help="0 表示不限")
+@click.option("--page-size", type=click.IntRange(min=1), default=None, help="分页大小（启用分页）")
+@click.option("--after", type=str, default=None, help="从该分页令牌之后继续")
+@click.option("--before", type=str, default=None, help="取该分页令牌之前的一页")
+def list_records(limit: int, page_size: Optional[int], after: Optional[str], before: Optional[str]) -> None:
+    svc = RecordService()
+    if page_size or after or before:
+        _echo_page(svc.list_page(page_size=page_size or limit or 20, after=after, before=before))
+        return
+    _echo_records(svc.iter_recent(limit=limit or None))
+
+
+@click.command("search")
+@click.option("--min", "min_amount", type=float)
+@click.option("--max", "max_amount", type=float)
+@click.option("--start", type=str)
+@click.option("--end", type=str)
+@click.option("--keyword", type=str)
+@click.option("--type", "type_", type=click.Choice(["income", "expense"]))
+@click.option("--limit", type=click.IntRange(min=0), default=200, show_default=True, help="0 表示不限")
+@click.option(
+    "--order",
+    "order_by",
+    type=click.Choice(["date_desc", "date_asc", "amount_desc", "amount_asc"]),
+    default="date_desc",
+    show_default=True,
+)
+@click.option("--page-size", type=click.IntRange(min=1), default=None, help="分页大小（启用分页）")
+@click.option("--after", type=str, default=None, help="从该分页令牌之后继续")
+@click.option("--before", type=str, default=None, help="取该分页令牌之前的一页")
+def search(
+    min_amount: Optional[float],
+    max_amount: Optional[float],
+    start: Optional[str],
+    end: Optional[str],
+    keyword: Optional[str],
+    type_: Optional[str],
+    limit: int,
+    order_by: str,
+    page_size: Optional[int],
+    after: Optional[str],
+    before: Optional[str],
+) -> None:
+    repo = RecordRepository()
+    filters = dict(
+        min_amount=min_amount,
+        max_amount=max_amount,
+        start=parse_date(start) if start else None,
+        end=parse_date(end) if end else None,
+        keyword=keyword,
+        type_=type_,
+        order_by=order_by,
+    )
+    if page_size or after or before:
+        _echo_page(repo.search_page(page_size=page_size or limit or 20, after=after, before=before, **filters))
+        return
+    _echo_records(repo.iter_search(limit=limit or None, **filters))
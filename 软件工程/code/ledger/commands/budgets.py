@@ -0,0 +1,49 @@
+"""Budget commands: set-budget, set-category-budget, budget-progress."""
+
+from __future__ import annotations
+
+import click
+from tabulate import tabulate
+
+from ..output import echo
+from ..services import BudgetService
+
+
+@click.command("set-budget")
+@click.option("--month", type=str, required=True)
+@click.option("--total", type=float, required=True)
+@click.option("--threshold", type=float, default=0.8, show_default=True)
+def set_budget(month: str, total: float, threshold: float) -> None:
+    bs = BudgetService()
+    b = bs.set_budget(month, total, threshold)
+    echo(f"预算已更新：{b.month} 总额={b.total} 阈值={b.threshold}")
+
+
+@click.command("set-category-budget")
+@click.option("--month", type=str, required=True)
+@click.option("--category", type=str, required=True)
+@click.option("--amount", type=float, required=True)
+def set_category_budget(month: str, category: str, amount: float) -> None:
+    bs = BudgetService()
+    bs.set_category_budget(month, category, amount)
+    echo("分类预算已设置")
+
+
+@click.command("budget-progress")
+@click.option("--month", type=str, required=True)
+def budget_progress(month: str) -> None:
+    bs = BudgetService()
+    p = bs.progress(month)
+    echo(
+        tabulate(
+            [
+                (p.month, p.total_budget, p.total_expense, f"{p.usage_ratio:.2%}", f"{p.threshold:.0%}")
+            ],
+            headers=["月份", "总预算", "已用", "使用率", "阈值"],
+        )
+    )
+    if p.total_budget > 0 and p.usage_ratio >= p.threshold:
+        echo("[预警] 已达到预算阈值！")
+    if p.by_category:
+        echo("\n分类预算：")
+        echo(tabulate([(n, b, u) for (n, b, u) in p.by_category], headers=["分类", "预算", "已用"]))
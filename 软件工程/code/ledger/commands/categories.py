@@ -0,0 +1,22 @@
+"""Category commands: add-category, list-categories."""
+
+from __future__ import annotations
+
+import click
+
+from ..output import echo, emit
+from ..services import CategoryService
+
+
+@click.command("add-category")
+@click.argument("name")
+def add_category(name: str) -> None:
+    svc = CategoryService()
+    c = svc.add(name)
+    echo(f"分类已添加：{c.name} (id={c.id})")
+
+
+@click.command("list-categories")
+def list_categories() -> None:
+    svc = CategoryService()
+    emit(("id", "name"), ((c.id, c.name) for c in svc.list()), headers=("ID", "名称"))
@@ -0,0 +1,53 @@
+"""Maintenance commands: rebuild-search-index, rebuild-rollups, explain."""
+
+from __future__ import annotations
+
+import sys
+
+import click
+from tabulate import tabulate
+
+from ..advisor import explain_queries
+from ..database import rebuild_rollups, rebuild_search_index, verify_rollups
+from ..output import echo
+
+
+@click.command("rebuild-search-index")
+def rebuild_search_index_cmd() -> None:
+    """重建备注全文索引（FTS5 trigram）"""
+    if rebuild_search_index():
+        echo("全文索引已重建")
+    else:
+        echo("当前 SQLite 不支持 FTS5 trigram，关键词搜索使用 LIKE")
+
+
+@click.command("rebuild-rollups")
+@click.option("--check", is_flag=True, help="只校验汇总表，不重建")
+def rebuild_rollups_cmd(check: bool) -> None:
+    """重建 / 校验月度分类汇总表（预算进度使用）"""
+    if not check:
+        rebuild_rollups()
+        echo("月度汇总已重建")
+    mismatches = verify_rollups()
+    if mismatches:
+        echo(tabulate(mismatches, headers=["月份", "类型", "分类ID", "应为", "汇总表"]))
+        sys.exit(1)
+    echo("月度汇总与记录一致")
+
+
+@click.command("explain")
+@click.option("--verbose", is_flag=True, help="同时打印 SQL")
+def explain(verbose: bool) -> None:
+    """对各仓储查询运行 EXPLAIN QUERY PLAN，标记全表扫描与临时 B 树排序"""
+    flagged = 0
+    for report in explain_queries():
+        status = "需关注" if report.warnings else "OK"
+        echo(f"[{status}] {report.name}")
+        if verbose:
+            echo(f"    {report.sql}")
+        for detail in report.plan:
+            echo(f"    {detail}")
+        for warning in report.warnings:
+            echo(f"    ! {warning}")
+        flagged += bool(report.warnings)
+    echo(f"\n共 {flagged} 个查询需要关注")
@@ -0,0 +1,66 @@
+"""Record write commands: add-record, update-record, delete-record."""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import click
+
+from ..output import echo
+from ..services import RecordService
+from ..utils import parse_date
+
+
+@click.command("add-record")
+@click.option("--type", "type_", type=click.Choice(["income", "expense"]), required=True)
+@click.option("--amount", type=float, required=True)
+@click.option("--date", "date_str", type=str, required=True)
+@click.option("--method", "payment_method", type=str, required=True)
+@click.option("--category", type=str, default=None)
+@click.option("--note", type=str, default="")
+def add_record(
+    type_: str, amount: float, date_str: str, payment_method: str, category: Optional[str], note: str
+) -> None:
+    svc = RecordService()
+    r = svc.add_record(
+        type_=type_, amount=amount, date_=parse_date(date_str), payment_method=payment_method, category=category, note=note
+    )
+    echo(f"记录已添加：id={r.id}, {r.type}, {r.amount}, {r.date}")
+
+
+@click.command("update-record")
+@click.argument("record_id", type=int)
+@click.option("--type", "type_", type=click.Choice(["income", "expense"]))
+@click.option("--amount", type=float)
+@click.option("--date", "date_str", type=str)
+@click.option("--method", "payment_method", type=str)
+@click.option("--category", type=str)
+@click.option("--note", type=str)
+def update_record(
+    record_id: int,
+    type_: Optional[str],
+    amount: Optional[float],
+    date_str: Optional[str],
+    payment_method: Optional[str],
+    category: Optional[str],
+    note: Optional[str],
+) -> None:
+    svc = RecordService()
+    svc.update_record(
+        record_id,
+        type_=type_,
+        amount=amount,
+        date_=parse_date(date_str) if date_str else None,
+        payment_method=payment_method,
+        category=category if category is not None else None,
+        note=note,
+    )
+    echo("记录已更新")
+
+
+@click.command("delete-record")
+@click.argument("record_ids", type=int, nargs=-1, required=True)
+def delete_record(record_ids: Tuple[int, ...]) -> None:
+    svc = RecordService()
+    count = svc.delete_records(record_ids)
+    echo(f"记录已删除（{count} 条）")
@@ -0,0 +1,38 @@
+"""Server command: serve."""
+
+from __future__ import annotations
+
+import asyncio
+import signal
+from typing import Optional
+
+import click
+
+
+@click.command("serve")
+@click.option(
+    "--address",
+    default=None,
+    help="监听地址：unix:路径 或 tcp:主机:端口；默认为数据库文件旁的 .sock（Windows 为 tcp:127.0.0.1:8765）",
+)
+@click.option("--readers", type=click.IntRange(min=1), default=4, show_default=True, help="读线程数（每个线程保持一个连接）")
+def serve(address: Optional[str], readers: int) -> None:
+    """常驻服务：通过本地套接字提供 JSON 接口，其他命令可用 --server 转发"""
+    from ..server import LedgerServer
+
+    server = LedgerServer(address, readers=readers)
+
+    async def run() -> None:
+        await server.start()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.stop)
+        except (NotImplementedError, AttributeError):
+            pass  # no SIGTERM handlers on Windows; Ctrl+C still works
+        click.echo(f"服务已启动：{server.address}（Ctrl+C 停止）", err=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    click.echo("服务已停止", err=True)
@@ -0,0 +1,151 @@
+"""Statistics command: stats."""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import Iterable, Optional, Sequence, Tuple
+
+import click
+
+from ..models import PivotTable
+from ..output import current_format, echo, emit
+from ..stats import ENGINES, PIVOT_DIMENSIONS, PIVOT_MEASURES, StatsService
+from ..utils import TIME_BUCKETS, parse_date
+
+_DIMENSION_LABELS = {
+    "day": "日期",
+    "week": "周（周一）",
+    "month": "月份",
+    "quarter": "季度",
+    "year": "年份",
+    "category": "分类",
+    "method": "支付方式",
+    "type": "类型",
+}
+_MEASURE_LABELS = {"amount": "金额", "income": "收入", "expense": "支出", "count": "笔数"}
+
+
+def _parse_pivot(ctx: click.Context, param: click.Parameter, value: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+    if value is None:
+        return None
+    rows, _, cols = value.partition(":")
+    for name in filter(None, (rows, cols)):
+        if name not in PIVOT_DIMENSIONS:
+            raise click.BadParameter(f"未知维度 {name!r}，可选：{', '.join(PIVOT_DIMENSIONS)}", ctx, param)
+    if not rows:
+        raise click.BadParameter("格式为 行维度[:列维度]", ctx, param)
+    return rows, cols or None
+
+
+def _width(text: str) -> int:
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def _echo_stream(headers: Sequence[str], rows: Iterable[Sequence[object]], min_width: int = 10) -> None:
+    """Print a table row by row; column widths are fixed from the headers."""
+    widths = [max(_width(h), min_width) for h in headers]
+    widths[0] = max(widths[0], 12)
+
+    def line(cells: Sequence[str]) -> str:
+        out = []
+        for i, (cell, width) in enumerate(zip(cells, widths)):
+            pad = " " * max(width - _width(cell), 0)
+            out.append(cell + pad if i == 0 else pad + cell)
+        return "  ".join(out)
+
+    echo(line(headers))
+    echo("  ".join("-" * w for w in widths))
+    for row in rows:
+        echo(line([str(row[0])] + [f"{v:.2f}" if isinstance(v, float) else str(v) for v in row[1:]]))
+
+
+def _pivot_headers(table: PivotTable, measures: Sequence[str]) -> list:
+    if table.cols_dimension is None:
+        return list(measures)
+    if len(measures) == 1:
+        return list(table.columns)
+    return [f"{c}/{m}" for c in table.columns for m in measures]
+
+
+def _echo_pivot(table: PivotTable) -> None:
+    rows = ((label, *values) for label, values in table.rows)
+    if current_format() != "table":
+        emit([table.rows_dimension] + _pivot_headers(table, table.measures), rows)
+        return
+    headers = _pivot_headers(table, [_MEASURE_LABELS[m] for m in table.measures])
+    _echo_stream([_DIMENSION_LABELS[table.rows_dimension]] + headers, rows)
+
+
+@click.command("stats")
+@click.option("--dimension", type=click.Choice(["time", "category", "method"]), default=None)
+@click.option("--start", type=str, required=True)
+@click.option("--end", type=str, required=True)
+@click.option(
+    "--granularity",
+    type=click.Choice(list(TIME_BUCKETS)),
+    default="day",
+    show_default=True,
+    help="--dimension time 的时间粒度，空区间补 0",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(list(ENGINES)),
+    envvar="LEDGER_STATS_ENGINE",
+    default="sql",
+    show_default=True,
+    help="汇总引擎：sql（SQLite 分组）或 numpy（需安装 NumPy）",
+)
+@click.option(
+    "--pivot",
+    callback=_parse_pivot,
+    default=None,
+    help=f"交叉表 行维度[:列维度]，维度：{', '.join(PIVOT_DIMENSIONS)}",
+)
+@click.option(
+    "--measure",
+    "measures",
+    type=click.Choice(list(PIVOT_MEASURES)),
+    multiple=True,
+    help="交叉表度量，可重复；默认 amount（支出正/收入负）",
+)
+def stats(
+    dimension: Optional[str],
+    start: str,
+    end: str,
+    granularity: str,
+    engine: str,
+    pivot: Optional[Tuple[str, Optional[str]]],
+    measures: Tuple[str, ...],
+) -> None:
+    if (dimension is None) == (pivot is None):
+        raise click.UsageError("请指定 --dimension 或 --pivot 之一")
+    try:
+        ss = StatsService(engine)
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    start_d = parse_date(start)
+    end_d = parse_date(end)
+    if pivot is not None:
+        rows, cols = pivot
+        if rows == cols:
+            raise click.UsageError("行维度与列维度不能相同")
+        _echo_pivot(ss.pivot(rows, cols, measures or ("amount",), start=start_d, end=end_d))
+        return
+    if dimension == "time":
+        res = ss.stats_by_time(start_d, end_d, granularity=granularity)
+    elif dimension == "category":
+        res = ss.stats_by_category(start_d, end_d)
+    else:
+        res = ss.stats_by_method(start_d, end_d)
+    if current_format() != "table":
+        emit((granularity if dimension == "time" else dimension, "amount"), res.items)
+        echo(f"总收入：{res.total_income}，总支出：{res.total_expense}", err=True)
+        return
+    from tabulate import tabulate
+
+    echo(tabulate(res.items, headers=["项", "金额(支出正/收入负)"]))
+    echo(
+        tabulate(
+            [(res.total_income, res.total_expense)], headers=["总收入", "总支出"], tablefmt="simple"
+        )
+    )
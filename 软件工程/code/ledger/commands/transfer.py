@@ -0,0 +1,76 @@
+"""Bulk data transfer commands: import, export."""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import click
+
+from ..fileio import FORMATS, infer_format, iter_import_rows, open_export
+from ..services import RecordService
+from ..utils import parse_date
+
+
+@click.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(list(FORMATS)), default=None, help="默认按扩展名推断")
+@click.option("--batch-size", type=click.IntRange(min=1), default=5000, show_default=True)
+def import_records(path: str, fmt: Optional[str], batch_size: int) -> None:
+    """批量导入 CSV / JSONL 记录（列：type,amount,date,method,category,note）"""
+    svc = RecordService()
+    count = svc.import_records(
+        iter_import_rows(path, fmt),
+        batch_size=batch_size,
+        on_progress=lambda n: click.echo(f"已导入 {n} 条…", err=True),
+    )
+    click.echo(f"导入完成：共 {count} 条记录")
+
+
+@click.command("export")
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True))
+@click.option("--format", "fmt", type=click.Choice(list(FORMATS)), default=None, help="默认按扩展名推断（- 为 csv）")
+@click.option("--gzip/--no-gzip", "compress", default=None, help="gzip 压缩（默认按 .gz 扩展名判断）")
+@click.option("--min", "min_amount", type=float)
+@click.option("--max", "max_amount", type=float)
+@click.option("--start", type=str)
+@click.option("--end", type=str)
+@click.option("--keyword", type=str)
+@click.option("--type", "type_", type=click.Choice(["income", "expense"]))
+@click.option("--since-id", type=click.IntRange(min=0), default=None, help="只导出 ID 大于该值的记录（续传时追加到已有文件）")
+def export_records(
+    path: str,
+    fmt: Optional[str],
+    compress: Optional[bool],
+    min_amount: Optional[float],
+    max_amount: Optional[float],
+    start: Optional[str],
+    end: Optional[str],
+    keyword: Optional[str],
+    type_: Optional[str],
+    since_id: Optional[int],
+) -> None:
+    """流式导出记录为 CSV / JSONL（按 ID 顺序，内存占用恒定）"""
+    if fmt is None:
+        try:
+            fmt = "csv" if path == "-" else infer_format(path)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc), param_hint="--format") from exc
+    # Resuming appends to the partial file, so its header is already there.
+    append = since_id is not None and path != "-" and os.path.exists(path)
+    svc = RecordService()
+    with open_export(path, compress=compress, append=append) as fh:
+        result = svc.export(
+            fh,
+            fmt,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=parse_date(start) if start else None,
+            end=parse_date(end) if end else None,
+            keyword=keyword,
+            type_=type_,
+            since_id=since_id,
+            header=not append,
+            on_progress=lambda n: click.echo(f"已导出 {n} 条…", err=True),
+        )
+    click.echo(f"导出完成：共 {result.count} 条记录，最后 ID：{result.last_id or '-'}", err=path == "-")
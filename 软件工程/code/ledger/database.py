@@ -1,7 +1,10 @@
 import os
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
-from typing import Iterator, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 
 DEFAULT_DB_PATH = os.path.join(
@@ -9,134 +12,882 @@ DEFAULT_DB_PATH = os.path.join(
 )
 
 
+def set_default_db_path(path: str) -> None:
+    """Point every db_cursor() without an explicit path at ``path``."""
+    global DEFAULT_DB_PATH
+    DEFAULT_DB_PATH = path
+
+
 def _ensure_directory(path: str) -> None:
     directory = os.path.dirname(path)
     if directory and not os.path.exists(directory):
         os.makedirs(directory, exist_ok=True)
 
 
-def get_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
+@dataclass(frozen=True)
+class PerformanceProfile:
+    """Connection-level SQLite pragmas applied when a connection opens."""
+
+    name: str
+    synchronous: str
+    cache_size: int  # negative values are KiB, as in PRAGMA cache_size
+    mmap_size: int
+    temp_store: str
+    busy_timeout: int  # milliseconds
+    journal_mode: str = "WAL"
+
+
+PROFILES: Dict[str, PerformanceProfile] = {
+    # Durable on power loss; the closest to SQLite defaults.
+    "safe": PerformanceProfile(
+        name="safe",
+        synchronous="FULL",
+        cache_size=-2000,
+        mmap_size=0,
+        temp_store="DEFAULT",
+        busy_timeout=5000,
+    ),
+    # WAL + NORMAL only risks the last commits on power loss, never corruption.
+    "balanced": PerformanceProfile(
+        name="balanced",
+        synchronous="NORMAL",
+        cache_size=-16000,
+        mmap_size=64 * 1024 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=5000,
+    ),
+    # For large imports; a crash mid-import may lose the import.
+    "bulk": PerformanceProfile(
+        name="bulk",
+        synchronous="OFF",
+        cache_size=-128000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=30000,
+    ),
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: str) -> PerformanceProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown performance profile: {name} (choose from {', '.join(PROFILES)})"
+        ) from None
+
+
+def apply_profile(connection: sqlite3.Connection, profile: PerformanceProfile) -> None:
+    connection.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout)}")
+    connection.execute(f"PRAGMA journal_mode = {profile.journal_mode}")
+    connection.execute(f"PRAGMA synchronous = {profile.synchronous}")
+    connection.execute(f"PRAGMA cache_size = {int(profile.cache_size)}")
+    connection.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)}")
+    connection.execute(f"PRAGMA temp_store = {profile.temp_store}")
+
+
+class QueryProfiler:
+    """Opt-in per-statement timing for the data layer.
+
+    Statements run through pooled cursors are timed from execute() through
+    the last fetch, keyed by their SQL text with parameters unexpanded.
+    The sqlite3 trace callback counts statements that bypass those cursors
+    (connection-level PRAGMAs, implicit BEGIN). Outermost db_cursor() scopes
+    and their COMMITs are timed as "[db_cursor]" and "COMMIT".
+    """
+
+    MAX_SAMPLES = 10000  # per statement, reservoir-sampled beyond that
+
+    def __init__(self, slow_ms: Optional[float] = None, slow_log: Optional[str] = None) -> None:
+        # Imported here so that a plain CLI start-up does not pay for them.
+        import logging
+        import random
+
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._rng = random.Random(0)
+        self._slow_logger: Optional["logging.Logger"] = None
+        if slow_log:
+            self._slow_logger = logging.getLogger("ledger.slow_query")
+            self._slow_logger.setLevel(logging.INFO)
+            self._slow_logger.propagate = False
+            if slow_log == "-":
+                handler: logging.Handler = logging.StreamHandler()  # stderr
+            else:
+                handler = logging.FileHandler(slow_log, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._slow_logger.addHandler(handler)
+
+    def record(self, sql: str, elapsed_ms: float, rows: int = 0, params: Any = None) -> None:
+        key = " ".join(sql.split())
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = {"count": 0, "total_ms": 0.0, "rows": 0, "samples": []}
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["rows"] += rows
+            samples = entry["samples"]
+            if len(samples) < self.MAX_SAMPLES:
+                samples.append(elapsed_ms)
+            else:
+                slot = self._rng.randrange(entry["count"])
+                if slot < self.MAX_SAMPLES:
+                    samples[slot] = elapsed_ms
+        if self._slow_logger and self.slow_ms is not None and elapsed_ms >= self.slow_ms:
+            suffix = f" params={params!r}"[:500] if params is not None else ""
+            self._slow_logger.info("%.1fms rows=%d %s%s", elapsed_ms, rows, key, suffix)
+
+    @property
+    def busy(self) -> bool:
+        return getattr(self._local, "busy", False)
+
+    @busy.setter
+    def busy(self, value: bool) -> None:
+        self._local.busy = value
+
+    def trace(self, statement: str) -> None:
+        if not self.busy:
+            self.record(statement, 0.0)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Per-statement count, total_ms, p50_ms, p95_ms and rows, slowest first."""
+        with self._lock:
+            items = [(sql, dict(entry, samples=sorted(entry["samples"]))) for sql, entry in self._stats.items()]
+        out = []
+        for sql, entry in items:
+            samples = entry["samples"]
+            out.append(
+                {
+                    "sql": sql,
+                    "count": entry["count"],
+                    "total_ms": entry["total_ms"],
+                    "p50_ms": samples[len(samples) // 2] if samples else 0.0,
+                    "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0,
+                    "rows": entry["rows"],
+                }
+            )
+        out.sort(key=lambda e: e["total_ms"], reverse=True)
+        return out
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor that reports each statement to the active QueryProfiler."""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        super().__init__(connection)
+        self._sql: Optional[str] = None
+        self._params: Any = None
+        self._rows = 0
+        self._elapsed = 0.0
+
+    def _begin(self, sql: str, params: Any) -> None:
+        self._finish()
+        self._sql, self._params, self._rows, self._elapsed = sql, params, 0, 0.0
+
+    def _finish(self) -> None:
+        sql = self._sql
+        if sql is not None and _profiler is not None:
+            _profiler.record(sql, self._elapsed * 1000, self._rows, self._params)
+        self._sql = None
+
+    def _timed(self, fn, *args):
+        profiler = _profiler
+        if profiler is None:
+            return fn(*args)
+        profiler.busy = True
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._elapsed += time.perf_counter() - t0
+            profiler.busy = False
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        self._timed(super().execute, sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, None)
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._rows = max(self.rowcount, 0)
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        self._rows += row is not None
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, size if size is not None else self.arraysize)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._rows += len(rows)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+_profiler: Optional[QueryProfiler] = None
+
+
+def get_profiler() -> Optional[QueryProfiler]:
+    return _profiler
+
+
+def enable_profiling(slow_ms: Optional[float] = None, slow_log: Optional[str] = None) -> QueryProfiler:
+    """Start collecting statement timings on every pooled connection."""
+    global _profiler
+    _profiler = QueryProfiler(slow_ms=slow_ms, slow_log=slow_log)
+    for manager in list(_managers.values()):
+        for conn in manager.connections():
+            conn.set_trace_callback(_profiler.trace)
+    return _profiler
+
+
+def enable_profiling_from_env() -> Optional[QueryProfiler]:
+    """Honour LEDGER_PROFILE, LEDGER_SLOW_QUERY_MS and LEDGER_SLOW_QUERY_LOG."""
+    if os.environ.get("LEDGER_PROFILE", "") in ("", "0"):
+        return None
+    slow_ms = os.environ.get("LEDGER_SLOW_QUERY_MS")
+    return enable_profiling(
+        slow_ms=float(slow_ms) if slow_ms else 100.0,
+        slow_log=os.environ.get("LEDGER_SLOW_QUERY_LOG") or None,
+    )
+
+
+def disable_profiling() -> None:
+    global _profiler
+    _profiler = None
+    for manager in list(_managers.values()):
+        for conn in manager.connections():
+            conn.set_trace_callback(None)
+
+
+def get_connection(
+    db_path: Optional[str] = None, profile: Optional[PerformanceProfile] = None
+) -> sqlite3.Connection:
     path = db_path or DEFAULT_DB_PATH
     _ensure_directory(path)
-    connection = sqlite3.connect(path)
+    # Connections are owned by one thread, but close_all() may run elsewhere.
+    connection = sqlite3.connect(path, check_same_thread=False)
     connection.row_factory = sqlite3.Row
+    apply_profile(connection, profile or PROFILES[DEFAULT_PROFILE])
+    if _profiler is not None:
+        connection.set_trace_callback(_profiler.trace)
     return connection
 
 
+class ConnectionManager:
+    """Keeps one long-lived connection per thread for a database file.
+
+    Nested ``cursor()`` scopes on the same thread share the outermost
+    scope's transaction; only the outermost scope commits or rolls back.
+    """
+
+    def __init__(
+        self, db_path: Optional[str] = None, profile: str = DEFAULT_PROFILE
+    ) -> None:
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.profile = get_profile(profile)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._has_search_index: Optional[bool] = None
+        self._generation = 0
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = get_connection(self.db_path, self.profile)
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.after_commit = []
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def connections(self) -> List[sqlite3.Connection]:
+        """The open connections of every thread, as a snapshot."""
+        with self._lock:
+            return list(self._connections)
+
+    @staticmethod
+    def _new_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+        return conn.cursor(ProfilingCursor) if _profiler is not None else conn.cursor()
+
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        conn = self.connection()
+        self._local.depth += 1
+        outermost = self._local.depth == 1
+        started = time.perf_counter()
+        cursor = self._new_cursor(conn)
+        try:
+            yield cursor
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.rollback()
+                self._local.after_commit = []
+                self._generation += 1
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self._commit(conn)
+                callbacks, self._local.after_commit = self._local.after_commit, []
+                for callback in callbacks:
+                    callback()
+        finally:
+            cursor.close()
+            profiler = _profiler
+            if profiler is not None and outermost:
+                profiler.record("[db_cursor]", (time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def _commit(conn: sqlite3.Connection) -> None:
+        profiler = _profiler
+        if profiler is None or not conn.in_transaction:
+            conn.commit()
+            return
+        profiler.busy = True
+        t0 = time.perf_counter()
+        try:
+            conn.commit()
+        finally:
+            profiler.busy = False
+            profiler.record("COMMIT", (time.perf_counter() - t0) * 1000)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Unit of work: every db_cursor() opened inside on this thread joins
+        one write transaction, committed once at the end.
+        """
+        conn = self.connection()
+        if self._local.depth == 0 and not conn.in_transaction:
+            # Take the write lock up front instead of upgrading mid-way.
+            conn.execute("BEGIN IMMEDIATE")
+        with self.cursor() as cursor:
+            yield cursor
+
+    @contextmanager
+    def read_cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Cursor for long-lived reads; it never commits or ends a transaction."""
+        cursor = self._new_cursor(self.connection())
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` once this thread's open transaction commits, or now
+        if none is open; a rollback drops it.
+        """
+        if self.connection().in_transaction:
+            self._local.after_commit.append(callback)
+        else:
+            callback()
+
+    def change_generation(self) -> int:
+        """Counter bumped when another connection has committed since this
+        thread last asked (``PRAGMA data_version``) or a transaction rolled back.
+
+        Caches compare it to decide whether their contents may be stale.
+        """
+        version = self.connection().execute("PRAGMA data_version").fetchone()[0]
+        seen = getattr(self._local, "data_version", None)
+        # A thread's first call has no baseline: commits may have happened since
+        # another thread filled the caches, so treat that as a change too.
+        if seen != version:
+            with self._lock:
+                self._generation += 1
+        self._local.data_version = version
+        return self._generation
+
+    def has_search_index(self) -> bool:
+        """Whether the records_fts full-text index exists (cached per manager)."""
+        if self._has_search_index is None:
+            with self.read_cursor() as cur:
+                cur.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'records_fts'"
+                )
+                self._has_search_index = cur.fetchone() is not None
+        return self._has_search_index
+
+    def reset_search_index_flag(self) -> None:
+        """Forget the cached has_search_index() answer, e.g. after a migration."""
+        self._has_search_index = None
+
+    def set_profile(self, name: str) -> None:
+        """Switch profile; open connections are closed and reopen with it."""
+        profile = get_profile(name)
+        if profile != self.profile:
+            self.profile = profile
+            self.close_all()
+
+    def close_all(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        # Threads holding a closed connection reconnect on next use.
+        self._local = threading.local()
+
+    def __enter__(self) -> "ConnectionManager":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close_all()
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_path: Optional[str] = None) -> ConnectionManager:
+    path = db_path or DEFAULT_DB_PATH
+    with _managers_lock:
+        manager = _managers.get(path)
+        if manager is None:
+            manager = ConnectionManager(path)
+            _managers[path] = manager
+    return manager
+
+
+def set_profile(name: str, db_path: Optional[str] = None) -> None:
+    get_manager(db_path).set_profile(name)
+
+
+def close_all() -> None:
+    """Close every pooled connection; the next db_cursor() reconnects."""
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.close_all()
+
+
 @contextmanager
 def db_cursor(db_path: Optional[str] = None) -> Iterator[sqlite3.Cursor]:
-    conn = get_connection(db_path)
-    try:
-        cursor = conn.cursor()
+    with get_manager(db_path).cursor() as cursor:
+        yield cursor
+
+
+@contextmanager
+def transaction(db_path: Optional[str] = None) -> Iterator[sqlite3.Cursor]:
+    with get_manager(db_path).transaction() as cursor:
         yield cursor
-        conn.commit()
-    finally:
-        conn.close()
 
 
-def migrate(db_path: Optional[str] = None) -> None:
-    """Create tables if not exists and apply basic indices.
+@contextmanager
+def db_read_cursor(db_path: Optional[str] = None) -> Iterator[sqlite3.Cursor]:
+    with get_manager(db_path).read_cursor() as cursor:
+        yield cursor
 
-    Tables:
-      - categories
-      - payment_methods
-      - records
-      - budgets
-      - budget_items
-      - meta (key-value for versioning)
+
+def has_search_index(db_path: Optional[str] = None) -> bool:
+    return get_manager(db_path).has_search_index()
+
+
+def _migration_0004_search_index(cur: sqlite3.Cursor) -> None:
+    """Full-text index over records.note, kept in sync by triggers.
+
+    The trigram tokenizer matches any substring of 3+ characters, which suits
+    Chinese notes that have no word separators.
     """
-    with db_cursor(db_path) as cur:
-        # Meta table for future migrations
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS meta (
-                key TEXT PRIMARY KEY,
-                value TEXT
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'records_fts'")
+    exists = cur.fetchone() is not None
+    if not exists:
+        try:
+            cur.execute(
+                """
+                CREATE VIRTUAL TABLE records_fts USING fts5(
+                    note, content='records', content_rowid='id', tokenize='trigram'
+                )
+                """
             )
-            """
-        )
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 / trigram (< 3.34): keyword search uses LIKE.
+            return
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS records_fts_ai AFTER INSERT ON records BEGIN
+            INSERT INTO records_fts(rowid, note) VALUES (new.id, new.note);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS records_fts_ad AFTER DELETE ON records BEGIN
+            INSERT INTO records_fts(records_fts, rowid, note) VALUES ('delete', old.id, old.note);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS records_fts_au AFTER UPDATE OF note ON records BEGIN
+            INSERT INTO records_fts(records_fts, rowid, note) VALUES ('delete', old.id, old.note);
+            INSERT INTO records_fts(rowid, note) VALUES (new.id, new.note);
+        END
+        """
+    )
+    if not exists:
+        # Index notes of records that predate the index.
+        cur.execute("INSERT INTO records_fts(records_fts) VALUES ('rebuild')")
 
-        # Categories
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE
-            )
-            """
-        )
 
-        # Payment methods (predefined but editable through records)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS payment_methods (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE
-            )
-            """
-        )
+def rebuild_search_index(db_path: Optional[str] = None) -> bool:
+    """Rebuild records_fts from records; returns False if there is no index."""
+    if not has_search_index(db_path):
+        return False
+    with db_cursor(db_path) as cur:
+        cur.execute("INSERT INTO records_fts(records_fts) VALUES ('rebuild')")
+    return True
+
+
+def _migration_0005_rollups(cur: sqlite3.Cursor) -> None:
+    """Per-month, per-type, per-category totals maintained by triggers on records.
+
+    category_id 0 stands for uncategorized records.
+    """
+    cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'monthly_category_totals'"
+    )
+    exists = cur.fetchone() is not None
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS monthly_category_totals (
+            month TEXT NOT NULL, -- YYYY-MM
+            type TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, type, category_id)
+        ) WITHOUT ROWID
+        """
+    )
+    add_new = """
+        INSERT INTO monthly_category_totals(month, type, category_id, total, count)
+        VALUES (substr(new.date, 1, 7), new.type, IFNULL(new.category_id, 0), new.amount, 1)
+        ON CONFLICT(month, type, category_id)
+        DO UPDATE SET total = total + excluded.total, count = count + 1;
+    """
+    remove_old = """
+        UPDATE monthly_category_totals SET total = total - old.amount, count = count - 1
+        WHERE month = substr(old.date, 1, 7) AND type = old.type
+          AND category_id = IFNULL(old.category_id, 0);
+        DELETE FROM monthly_category_totals
+        WHERE month = substr(old.date, 1, 7) AND type = old.type
+          AND category_id = IFNULL(old.category_id, 0) AND count <= 0;
+    """
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS records_rollup_ai AFTER INSERT ON records BEGIN {add_new} END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER IF NOT EXISTS records_rollup_ad AFTER DELETE ON records BEGIN {remove_old} END"
+    )
+    cur.execute(
+        "CREATE TRIGGER IF NOT EXISTS records_rollup_au "
+        "AFTER UPDATE OF type, amount, date, category_id ON records "
+        f"BEGIN {remove_old} {add_new} END"
+    )
+    if not exists:
+        _rebuild_rollups(cur)
+
+
+_ROLLUP_SOURCE_SQL = """
+    SELECT substr(date, 1, 7) AS month, type, IFNULL(category_id, 0) AS category_id,
+           SUM(amount) AS total, COUNT(*) AS count
+    FROM records
+    GROUP BY 1, 2, 3
+"""
+
 
-        # Records: income/expense
+def _rebuild_rollups(cur: sqlite3.Cursor) -> None:
+    cur.execute("DELETE FROM monthly_category_totals")
+    cur.execute(
+        "INSERT INTO monthly_category_totals(month, type, category_id, total, count) "
+        + _ROLLUP_SOURCE_SQL
+    )
+
+
+def rebuild_rollups(db_path: Optional[str] = None) -> None:
+    with db_cursor(db_path) as cur:
+        _rebuild_rollups(cur)
+
+
+def verify_rollups(db_path: Optional[str] = None) -> List[Tuple[str, str, int, int, int]]:
+    """Compare rollups with records; returns ``(month, type, category_id,
+    expected, stored)`` in cents for every group that differs.
+    """
+    with db_cursor(db_path) as cur:
+        cur.execute(_ROLLUP_SOURCE_SQL)
+        expected = {(r["month"], r["type"], r["category_id"]): r["total"] for r in cur.fetchall()}
+        cur.execute("SELECT month, type, category_id, total FROM monthly_category_totals")
+        stored = {(r["month"], r["type"], r["category_id"]): r["total"] for r in cur.fetchall()}
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want, have = expected.get(key, 0), stored.get(key, 0)
+        if want != have:
+            mismatches.append((*key, want, have))
+    return mismatches
+
+
+# Money columns hold integer minor units (分); see models.Money.
+_RECORDS_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        type TEXT NOT NULL CHECK(type IN ('income','expense')),
+        amount INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        payment_method_id INTEGER NOT NULL,
+        category_id INTEGER,
+        note TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        FOREIGN KEY(payment_method_id) REFERENCES payment_methods(id),
+        FOREIGN KEY(category_id) REFERENCES categories(id)
+    )
+"""
+
+_BUDGETS_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        month TEXT NOT NULL UNIQUE, -- YYYY-MM
+        total INTEGER NOT NULL,
+        threshold REAL NOT NULL DEFAULT 0.8
+    )
+"""
+
+_BUDGET_ITEMS_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        budget_id INTEGER NOT NULL,
+        category_id INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        UNIQUE(budget_id, category_id),
+        FOREIGN KEY(budget_id) REFERENCES budgets(id),
+        FOREIGN KEY(category_id) REFERENCES categories(id)
+    )
+"""
+
+_MONEY_COLUMNS = (
+    ("records", _RECORDS_DDL, ("amount",)),
+    ("budgets", _BUDGETS_DDL, ("total",)),
+    ("budget_items", _BUDGET_ITEMS_DDL, ("amount",)),
+)
+
+
+def _migration_0002_amounts_to_cents(cur: sqlite3.Cursor) -> None:
+    """Rebuild tables created when money was stored as REAL yuan.
+
+    Ids and AUTOINCREMENT counters are preserved; dependent indexes and
+    triggers are recreated by the later migrations.
+    """
+    converted = False
+    for table, ddl, money in _MONEY_COLUMNS:
+        cur.execute(f"PRAGMA table_info({table})")
+        info = cur.fetchall()
+        if not any(col["name"] in money and col["type"].upper() == "REAL" for col in info):
+            continue
+        columns = [col["name"] for col in info]
+        select = ", ".join(
+            f"CAST(ROUND({c} * 100) AS INTEGER)" if c in money else c for c in columns
+        )
+        cur.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+        row = cur.fetchone()
+        cur.execute(ddl.format(table=f"{table}_cents"))
         cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type TEXT NOT NULL CHECK(type IN ('income','expense')),
-                amount REAL NOT NULL,
-                date TEXT NOT NULL,
-                payment_method_id INTEGER NOT NULL,
-                category_id INTEGER,
-                note TEXT,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY(payment_method_id) REFERENCES payment_methods(id),
-                FOREIGN KEY(category_id) REFERENCES categories(id)
+            f"INSERT INTO {table}_cents({', '.join(columns)}) SELECT {select} FROM {table}"
+        )
+        cur.execute(f"DROP TABLE {table}")
+        cur.execute(f"ALTER TABLE {table}_cents RENAME TO {table}")
+        if row is not None:
+            cur.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (row[0], table)
             )
-            """
+        converted = True
+    if converted:
+        # Old rollups hold yuan; _migration_0005_rollups() rebuilds them from records.
+        cur.execute("DROP TABLE IF EXISTS monthly_category_totals")
+        cur.execute(
+            "INSERT INTO meta(key, value) VALUES ('amount_unit', 'cents') "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value"
         )
 
-        # Budgets (per month)
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS budgets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                month TEXT NOT NULL UNIQUE, -- YYYY-MM
-                total REAL NOT NULL,
-                threshold REAL NOT NULL DEFAULT 0.8
-            )
-            """
+
+def _migration_0001_base_schema(cur: sqlite3.Cursor) -> None:
+    # Meta table: key-value settings; the schema version lives in PRAGMA user_version
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
         )
+        """
+    )
 
-        # Budget items per category
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS budget_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                budget_id INTEGER NOT NULL,
-                category_id INTEGER NOT NULL,
-                amount REAL NOT NULL,
-                UNIQUE(budget_id, category_id),
-                FOREIGN KEY(budget_id) REFERENCES budgets(id),
-                FOREIGN KEY(category_id) REFERENCES categories(id)
-            )
-            """
+    # Categories
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
         )
+        """
+    )
 
-        # Indices for performance
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_records_date ON records(date)")
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_records_category ON records(category_id)"
+    # Payment methods (predefined but editable through records)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS payment_methods (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE
         )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_records_payment ON records(payment_method_id)"
+        """
+    )
+
+    # Records: income/expense
+    cur.execute(_RECORDS_DDL.format(table="records"))
+
+    # Budgets (per month)
+    cur.execute(_BUDGETS_DDL.format(table="budgets"))
+
+    # Budget items per category
+    cur.execute(_BUDGET_ITEMS_DDL.format(table="budget_items"))
+
+    # Seed default payment methods if empty
+    cur.execute("SELECT COUNT(1) as c FROM payment_methods")
+    if cur.fetchone()[0] == 0:
+        cur.executemany(
+            "INSERT INTO payment_methods(name) VALUES (?)",
+            [("WeChat",), ("Alipay",), ("Cash",)],
         )
 
-        # Seed default payment methods if empty
-        cur.execute("SELECT COUNT(1) as c FROM payment_methods")
-        if cur.fetchone()[0] == 0:
-            cur.executemany(
-                "INSERT INTO payment_methods(name) VALUES (?)",
-                [("WeChat",), ("Alipay",), ("Cash",)],
-            )
+
+def _migration_0003_query_indexes(cur: sqlite3.Cursor) -> None:
+    # Indices shaped after the repository queries
+    # (see ledger.advisor / `ledger.cli explain`).
+    # date DESC, id DESC listing and date-range search
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_records_date ON records(date)")
+    # category / method filters ordered by date; supersede the single-column ones
+    cur.execute("DROP INDEX IF EXISTS idx_records_category")
+    cur.execute("DROP INDEX IF EXISTS idx_records_payment")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_records_category_date ON records(category_id, date)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_records_payment_date ON records(payment_method_id, date)"
+    )
+    # --min/--max ranges and amount ordering (rowid breaks ties)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_records_amount ON records(amount)")
+    # type + date range sums (budget progress), covering amount and category
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_records_type_date "
+        "ON records(type, date, amount, category_id)"
+    )
+    # date-range group-bys in StatsRepository without touching the table
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_records_date_totals "
+        "ON records(date, type, amount, category_id, payment_method_id)"
+    )
+
+
+def _migration_0006_drop_type_date_index(cur: sqlite3.Cursor) -> None:
+    # Budget progress reads monthly_category_totals now, so nothing needs the
+    # (type, date, amount, category_id) index; it only slowed inserts and imports.
+    cur.execute("DROP INDEX IF EXISTS idx_records_type_date")
+
+
+# Numbered schema migrations, applied in order and exactly once; the number
+# of the last applied one is stored in PRAGMA user_version. Append new steps
+# here and never renumber or edit released ones. Every step is idempotent,
+# so databases created before versioning (user_version 0) replay them safely.
+MIGRATIONS: Tuple[Tuple[int, str, Callable[[sqlite3.Cursor], None]], ...] = (
+    (1, "base schema", _migration_0001_base_schema),
+    (2, "money as integer cents", _migration_0002_amounts_to_cents),
+    (3, "query-shaped record indexes", _migration_0003_query_indexes),
+    (4, "records_fts search index", _migration_0004_search_index),
+    (5, "monthly_category_totals rollup", _migration_0005_rollups),
+    (6, "drop idx_records_type_date", _migration_0006_drop_type_date_index),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(db_path: Optional[str] = None) -> int:
+    with db_read_cursor(db_path) as cur:
+        cur.execute("PRAGMA user_version")
+        return cur.fetchone()[0]
+
+
+def migrate(db_path: Optional[str] = None, profile: Optional[str] = None) -> List[int]:
+    """Apply pending numbered migrations and return their numbers.
+
+    An up-to-date database costs a single ``PRAGMA user_version`` read.
+    Each migration runs in its own write transaction together with the
+    version bump, so concurrent processes never apply one twice.
+
+    When ``profile`` is given it becomes the active performance profile.
+    The active profile and resulting journal mode are recorded in ``meta``
+    whenever migrations run or the profile differs from the recorded one.
+
+    Tables:
+      - categories
+      - payment_methods
+      - records
+      - budgets
+      - budget_items
+      - meta (key-value settings)
+      - records_fts (FTS5 index over records.note, when available)
+      - monthly_category_totals (trigger-maintained rollup of records)
+    """
+    manager = get_manager(db_path)
+    if profile is not None:
+        manager.set_profile(profile)
+    applied: List[int] = []
+    if schema_version(db_path) < SCHEMA_VERSION:
+        for number, _, step in MIGRATIONS:
+            with manager.transaction() as cur:
+                cur.execute("PRAGMA user_version")
+                if cur.fetchone()[0] >= number:
+                    continue
+                step(cur)
+                cur.execute(f"PRAGMA user_version = {number:d}")
+                applied.append(number)
+        manager.reset_search_index_flag()
+    if applied or profile is not None:
+        _record_profile(manager, force=bool(applied))
+    return applied
+
+
+def _record_profile(manager: ConnectionManager, force: bool) -> None:
+    with manager.read_cursor() as cur:
+        cur.execute("SELECT value FROM meta WHERE key = 'performance_profile'")
+        row = cur.fetchone()
+    if not force and row is not None and row[0] == manager.profile.name:
+        return
+    with manager.transaction() as cur:
+        cur.execute("PRAGMA journal_mode")
+        journal_mode = cur.fetchone()[0]
+        cur.executemany(
+            """
+            INSERT INTO meta(key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+            """,
+            [
+                ("performance_profile", manager.profile.name),
+                ("journal_mode", journal_mode),
+            ],
+        )
 
 
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Dict, Iterator, Optional, Sequence
+
+
+FORMATS = ("csv", "jsonl")
+IMPORT_FIELDS = ("type", "amount", "date", "method", "category", "note")
+# A superset of IMPORT_FIELDS, so exported files can be imported again.
+EXPORT_FIELDS = ("id",) + IMPORT_FIELDS + ("created_at", "updated_at")
+
+
+def is_gzip(path: str) -> bool:
+    return path.lower().endswith(".gz")
+
+
+def infer_format(path: str) -> str:
+    ext = os.path.splitext(path[:-3] if is_gzip(path) else path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Cannot infer format from {path!r}; pass one of {', '.join(FORMATS)}")
+
+
+def iter_import_rows(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream rows from a CSV (with header) or JSON Lines file.
+
+    Each row is a mapping keyed by IMPORT_FIELDS; only one row is held at a time.
+    """
+    fmt = fmt or infer_format(path)
+    opener = gzip.open if is_gzip(path) else open
+    with opener(path, "rt", encoding="utf-8-sig", newline="") as fh:
+        if fmt == "csv":
+            yield from csv.DictReader(fh)
+        elif fmt == "jsonl":
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported format: {fmt}")
+
+
+@contextmanager
+def open_export(path: str, *, compress: Optional[bool] = None, append: bool = False) -> Iterator[IO[str]]:
+    """Text stream for an export; ``-`` is stdout, ``compress`` defaults to a .gz suffix.
+
+    Appending to a gzip file adds a member; gzip readers read them as one stream.
+    """
+    compress = is_gzip(path) if compress is None else compress
+    if path == "-":
+        raw = sys.stdout.buffer
+        stream = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+        fh = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        try:
+            yield fh
+        finally:
+            fh.detach()  # flushes, and keeps stdout open
+            if compress:
+                stream.close()  # writes the gzip trailer only
+            raw.flush()
+        return
+    mode = "at" if append else "wt"
+    opener = gzip.open if compress else open
+    with opener(path, mode, encoding="utf-8", newline="") as fh:
+        yield fh
+
+
+def row_writer(fh: IO[str], fmt: str, fields: Sequence[str], header: bool = True) -> Callable[[Sequence[Any]], None]:
+    """A function writing one row (values in ``fields`` order) to ``fh``."""
+    if fmt == "csv":
+        writer = csv.writer(fh)
+        if header:
+            writer.writerow(fields)
+        return writer.writerow
+    if fmt == "jsonl":
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+        def write(row: Sequence[Any]) -> None:
+            fh.write(dumps(dict(zip(fields, row))))
+            fh.write("\n")
+
+        return write
+    raise ValueError(f"Unsupported format: {fmt}")
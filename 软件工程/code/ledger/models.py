@@ -1,8 +1,45 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass
 from datetime import date, datetime
-from typing import Dict, List, Optional, Tuple
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+@dataclass(frozen=True, order=True)
+class Money:
+    """Exact amount in minor units (分); money columns store ``cents``."""
+
+    cents: int
+
+    @classmethod
+    def from_yuan(cls, value: Union[float, int, str, Decimal]) -> Money:
+        # Go through str() so 0.1 means 0.10, not the nearest binary float.
+        quantized = Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return cls(int(quantized * 100))
+
+    @property
+    def yuan(self) -> float:
+        return self.cents / 100
+
+    def __add__(self, other: Money) -> Money:
+        return Money(self.cents + other.cents)
+
+    def __sub__(self, other: Money) -> Money:
+        return Money(self.cents - other.cents)
+
+    def __str__(self) -> str:
+        units, minor = divmod(abs(self.cents), 100)
+        return f"{'-' if self.cents < 0 else ''}{units}.{minor:02d}"
+
+
+def to_cents(value: Union[float, int, str, Decimal]) -> int:
+    return Money.from_yuan(value).cents
+
+
+def from_cents(cents: Optional[int]) -> float:
+    return (cents or 0) / 100
 
 
 @dataclass
@@ -30,6 +67,117 @@ class Record:
     updated_at: datetime
 
 
+RECORD_TYPES = ("income", "expense")  # index is the type code used by RecordBatch
+
+
+class RecordView:
+    """Read-only view of one row of a RecordBatch; holds no data of its own."""
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: RecordBatch, index: int) -> None:
+        self._batch = batch
+        self._index = index
+
+    @property
+    def id(self) -> int:
+        return self._batch.ids[self._index]
+
+    @property
+    def type(self) -> str:
+        return RECORD_TYPES[self._batch.types[self._index]]
+
+    @property
+    def amount_cents(self) -> int:
+        return self._batch.amounts[self._index]
+
+    @property
+    def amount(self) -> float:
+        return from_cents(self._batch.amounts[self._index])
+
+    @property
+    def date(self) -> date:
+        return date.fromordinal(self._batch.dates[self._index])
+
+    @property
+    def payment_method_id(self) -> int:
+        return self._batch.method_ids[self._index]
+
+    @property
+    def category_id(self) -> Optional[int]:
+        return self._batch.category_ids[self._index] or None
+
+    def __repr__(self) -> str:
+        return f"RecordView(id={self.id}, type={self.type!r}, amount={self.amount}, date={self.date})"
+
+
+class RecordBatch:
+    """Columnar records for analytics: one typed array per field.
+
+    Notes and timestamps are left out. Columns hold amount in cents, the
+    date as ``date.toordinal()``, the type code (index into RECORD_TYPES),
+    category_id (0 = uncategorized) and payment_method_id, which is about
+    37 bytes per row. ``columns()`` exposes them as memoryviews.
+    """
+
+    __slots__ = ("ids", "amounts", "dates", "types", "category_ids", "method_ids")
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.amounts = array("q")
+        self.dates = array("i")
+        self.types = array("b")
+        self.category_ids = array("q")
+        self.method_ids = array("q")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[int]]) -> RecordBatch:
+        batch = cls()
+        batch.extend(rows)
+        return batch
+
+    def extend(self, rows: Iterable[Sequence[int]]) -> None:
+        """Append ``(id, type_code, amount_cents, date_ordinal, method_id, category_id)`` rows."""
+        rows = list(rows)
+        if not rows:
+            return
+        ids, types, amounts, dates, method_ids, category_ids = zip(*rows)
+        self.ids.extend(ids)
+        self.types.extend(types)
+        self.amounts.extend(amounts)
+        self.dates.extend(dates)
+        self.method_ids.extend(method_ids)
+        self.category_ids.extend(c or 0 for c in category_ids)
+
+    def columns(self) -> Dict[str, memoryview]:
+        return {name: memoryview(getattr(self, name)) for name in self.__slots__}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(col.itemsize * len(col) for col in (getattr(self, name) for name in self.__slots__))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> RecordView:
+        if index < 0:
+            index += len(self.ids)
+        if not 0 <= index < len(self.ids):
+            raise IndexError("RecordBatch index out of range")
+        return RecordView(self, index)
+
+    def __iter__(self) -> Iterator[RecordView]:
+        for index in range(len(self.ids)):
+            yield RecordView(self, index)
+
+
+@dataclass
+class RecordPage:
+    records: List[Record]
+    next_token: Optional[str]  # pass as ``after`` to fetch the following page
+    prev_token: Optional[str]  # pass as ``before`` to fetch the preceding page
+
+
 @dataclass
 class Budget:
     id: Optional[int]
@@ -65,6 +213,24 @@ class StatsResult:
     total_expense: float
 
 
+@dataclass
+class PivotTable:
+    rows_dimension: str
+    cols_dimension: Optional[str]
+    measures: Tuple[str, ...]
+    period: Tuple[date, date]
+    columns: List[str]  # column labels; empty without a column dimension
+    # (row_label, values) streamed in row order; values run column by column,
+    # one per measure within each column
+    rows: Iterator[Tuple[str, List[float]]]
+
+
+@dataclass
+class ExportResult:
+    count: int
+    last_id: Optional[int]  # pass as ``since_id`` to resume after this row
+
+
 def month_from_date(d: date) -> str:
     return d.strftime("%Y-%m")
 
@@ -0,0 +1,94 @@
+"""Result rendering for the CLI's global ``--format`` option.
+
+``table`` goes through tabulate, which needs every row before it prints
+anything. ``csv``, ``json`` and ``ndjson`` write each row as it arrives, so
+output piped into other tools starts at once and memory stays flat. Rows are
+keyed by ``columns``, which are stable identifiers; ``headers`` only label
+the table.
+
+Commands write through ``echo``/``stream`` rather than straight to stdout: a
+run inside ``ledger serve`` passes its own buffers in the root context's
+``obj``, so concurrent requests never share the process's streams.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+from datetime import date
+from typing import Any, Iterable, Optional, Sequence, TextIO
+
+import click
+
+OUTPUT_FORMATS = ("table", "csv", "json", "ndjson")
+
+
+def current_format() -> str:
+    """The --format given to the root command, or "table" outside a CLI run."""
+    ctx = click.get_current_context(silent=True)
+    if ctx is None:
+        return "table"
+    return ctx.find_root().params.get("output_format") or "table"
+
+
+def stream(err: bool = False) -> TextIO:
+    """The current run's stdout (or stderr): per-request buffers when served, else the process's."""
+    name = "stderr" if err else "stdout"
+    ctx = click.get_current_context(silent=True)
+    obj = ctx.find_root().obj if ctx is not None else None
+    if isinstance(obj, dict) and obj.get(name) is not None:
+        return obj[name]
+    return click.get_text_stream(name)
+
+
+def echo(message: Any = "", err: bool = False) -> None:
+    """click.echo() to stream(err)."""
+    click.echo(message, file=stream(err))
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def emit(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    headers: Optional[Sequence[str]] = None,
+    fmt: Optional[str] = None,
+) -> int:
+    """Write ``rows`` to stream() in ``fmt`` (default: current_format()); returns the row count."""
+    fmt = fmt or current_format()
+    count = 0
+    if fmt == "table":
+        from tabulate import tabulate
+
+        table = list(rows)
+        echo(tabulate(table, headers=list(headers or columns)))
+        return len(table)
+    out = stream()
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([_plain(v) if isinstance(v, date) else v for v in row])
+            count += 1
+        return count
+    if fmt not in ("json", "ndjson"):
+        raise ValueError(f"Unknown output format: {fmt}")
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_plain).encode
+    if fmt == "ndjson":
+        for row in rows:
+            out.write(encode(dict(zip(columns, row))))
+            out.write("\n")
+            count += 1
+        return count
+    # A JSON array, still written one element at a time.
+    out.write("[")
+    for row in rows:
+        out.write(",\n" if count else "\n")
+        out.write(encode(dict(zip(columns, row))))
+        count += 1
+    out.write("\n]\n" if count else "]\n")
+    return count
@@ -0,0 +1,155 @@
+"""Row-index window over the recent-records list for virtual list views.
+
+``RecordWindow`` keeps one contiguous slice of the list (date DESC, id DESC)
+in memory, bounded by ``capacity``. ``plan()`` says which fetch would cover
+the rows about to be shown. Nearby rows are fetched by extending the slice
+with page tokens. Far jumps reseek with OFFSET, counted from whichever is
+nearest: the start, the end, or an anchor row remembered every
+``fetch_size`` positions from earlier fetches. The fetch itself runs
+elsewhere (``fetch_window`` on a worker thread); ``apply()`` merges the
+result. Inserts and deletes adjust the slice in place instead of reloading
+it. Nothing here imports tkinter.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .models import Record
+from .services import RecordService
+
+
+class WindowRequest(NamedTuple):
+    kind: str  # "seek" | "seek_end" | "after" | "before"
+    offset: int  # list position of the first row the fetch returns
+    token: Optional[str]  # page token for "after"/"before", or the anchor a "seek" counts from
+    size: int
+    version: int  # RecordWindow.version when planned; stale results are dropped
+    skip: int = 0  # rows OFFSET skips: past the token (or the start) for "seek", before the end for "seek_end"
+
+
+def fetch_window(service: RecordService, request: WindowRequest) -> List[Record]:
+    if request.kind in ("seek", "seek_end"):
+        return service.list_window(
+            request.skip, request.size, after=request.token, from_end=request.kind == "seek_end"
+        )
+    page = service.list_page(page_size=request.size, **{request.kind: request.token})
+    return page.records
+
+
+class RecordWindow:
+    def __init__(self, service: RecordService, fetch_size: int = 200, capacity: int = 2000) -> None:
+        self._service = service
+        self.fetch_size = fetch_size
+        self.capacity = max(capacity, 2 * fetch_size)
+        self.total = 0
+        self.start = 0
+        self.rows: List[Record] = []
+        self.version = 0
+        # list position -> record there; far seeks count OFFSET from the nearest one
+        self._anchors: Dict[int, Record] = {}
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.rows)
+
+    def reset(self, total: int) -> None:
+        """Forget loaded rows, e.g. after a refresh; in-flight fetches are dropped."""
+        self.total = total
+        self.start = 0
+        self.rows = []
+        self.version += 1
+        self._anchors.clear()
+
+    def get(self, index: int) -> Optional[Record]:
+        if self.start <= index < self.end:
+            return self.rows[index - self.start]
+        return None
+
+    def plan(self, first: int, last: int) -> Optional[WindowRequest]:
+        """The next fetch needed to load rows [first, last), or None if loaded."""
+        first, last = max(first, 0), min(last, self.total)
+        if first >= last or (self.start <= first and last <= self.end):
+            return None
+        size = self.fetch_size
+        if self.rows and self.start <= first <= self.end < last:
+            return WindowRequest("after", self.end, self._service.page_token(self.rows[-1]), size, self.version)
+        if self.rows and first < self.start <= last <= self.end:
+            size = min(size, self.start)
+            return WindowRequest(
+                "before", self.start - size, self._service.page_token(self.rows[0]), size, self.version
+            )
+        # Far jump: center a fresh slice on the requested rows.
+        size = max(size, last - first)
+        offset = max(0, min(first - (size - (last - first)) // 2, self.total - size))
+        return self._seek(offset, size)
+
+    def _seek(self, offset: int, size: int) -> WindowRequest:
+        """A fetch of rows [offset, offset + size) that skips as few rows as it can."""
+        candidates = [(offset, "seek", None), (max(self.total - offset - size, 0), "seek_end", None)]
+        below = [p for p in self._anchors if p < offset]
+        if below:
+            anchor = max(below)
+            candidates.append((offset - anchor - 1, "seek", self._service.page_token(self._anchors[anchor])))
+        skip, kind, token = min(candidates, key=lambda c: c[0])
+        return WindowRequest(kind, offset, token, size, self.version, skip)
+
+    def apply(self, request: WindowRequest, records: List[Record]) -> bool:
+        """Merge a fetch result; returns False when it is stale."""
+        if request.version != self.version:
+            return False
+        if request.kind == "seek_end" and len(records) < request.size:
+            # Counting back from the end ran into the start of the list.
+            self.start, self.rows = 0, list(records)
+            self.total = len(records) + request.skip
+        elif request.kind in ("seek", "seek_end") or not self.rows:
+            self.start, self.rows = request.offset, list(records)
+        elif request.kind == "after" and request.offset == self.end:
+            self.rows.extend(records)
+            excess = len(self.rows) - self.capacity
+            if excess > 0:
+                del self.rows[:excess]
+                self.start += excess
+        elif request.kind == "before" and request.offset + request.size == self.start:
+            if len(records) < request.size:
+                # Fewer rows precede the slice than counted: it starts the list.
+                self.total -= self.start - len(records)
+                self.start = len(records)
+            self.rows[:0] = records
+            self.start -= len(records)
+            del self.rows[self.capacity :]
+        else:
+            return False
+        if len(records) < request.size and request.kind not in ("before", "seek_end"):
+            # Fewer rows than asked: the list ends here.
+            self.total = self.end
+        step = self.fetch_size
+        for position in range(-(-self.start // step) * step, self.end, step):
+            self._anchors[position] = self.rows[position - self.start]
+        return True
+
+    def insert(self, position: int, record: Record) -> None:
+        """Account for ``record`` inserted at list ``position``."""
+        at_tail = self.end == self.total
+        self.total += 1
+        self.version += 1  # fetches planned before this assumed the old positions
+        self._anchors = {p + (p >= position): r for p, r in self._anchors.items()}
+        if position < self.start or (position == self.start and self.start > 0):
+            self.start += 1
+        elif position < self.end or (position == self.end and at_tail):
+            self.rows.insert(position - self.start, record)
+
+    def remove(self, record_ids: Iterable[int]) -> None:
+        """Account for deleted records; ids outside the window force a reload."""
+        doomed = set(record_ids)
+        kept = [r for r in self.rows if r.id not in doomed]
+        removed = len(self.rows) - len(kept)
+        if removed < len(doomed):
+            self.reset(self.total - len(doomed))
+            return
+        gone = [self.start + i for i, r in enumerate(self.rows) if r.id in doomed]
+        self._anchors = {p - bisect_left(gone, p): r for p, r in self._anchors.items() if r.id not in doomed}
+        self.rows = kept
+        self.total -= removed
+        self.version += 1
@@ -1,10 +1,94 @@
 from __future__ import annotations
 
+import sqlite3
+import threading
 from datetime import date, datetime
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from .database import db_cursor
-from .models import Budget, BudgetItem, Category, PaymentMethod, Record
+from .database import db_cursor, db_read_cursor, get_manager, has_search_index
+from .models import (
+    Budget,
+    BudgetItem,
+    Category,
+    PaymentMethod,
+    RECORD_TYPES,
+    Record,
+    RecordBatch,
+    RecordPage,
+    from_cents,
+    to_cents,
+)
+
+
+class NameCache:
+    """In-process name <-> id map for a small lookup table.
+
+    Writes through the repositories invalidate it directly; commits from other
+    connections and rollbacks are noticed through the manager's change generation.
+    """
+
+    def __init__(self, table: str) -> None:
+        self._table = table
+        self._lock = threading.Lock()
+        self._by_name: Optional[Dict[str, int]] = None
+        self._by_id: Dict[int, str] = {}
+        self._generation = -1
+
+    def _load(self) -> Tuple[Dict[str, int], Dict[int, str]]:
+        manager = get_manager()
+        generation = manager.change_generation()
+        with self._lock:
+            if self._by_name is not None and generation == self._generation:
+                return self._by_name, self._by_id
+        with db_read_cursor() as cur:
+            cur.execute(f"SELECT id, name FROM {self._table}")
+            rows = cur.fetchall()
+        by_name = {r["name"]: r["id"] for r in rows}
+        by_id = {r["id"]: r["name"] for r in rows}
+        # Inside a transaction the rows may include ones that never commit;
+        # use them for this call only.
+        if not manager.connection().in_transaction:
+            with self._lock:
+                self._by_name, self._by_id, self._generation = by_name, by_id, generation
+        return by_name, by_id
+
+    def id_for(self, name: str) -> Optional[int]:
+        return self._load()[0].get(name)
+
+    def lookup(self, name: str) -> Optional[int]:
+        """``name``'s id read from the table, bypassing the cache."""
+        with db_read_cursor() as cur:
+            cur.execute(f"SELECT id FROM {self._table} WHERE name = ?", (name,))
+            row = cur.fetchone()
+        return row["id"] if row else None
+
+    def names_by_id(self) -> Dict[int, str]:
+        return dict(self._load()[1])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._by_name = None
+        # Threads that reload before an open transaction commits still miss
+        # its rows; drop the cache again once it has.
+        get_manager().after_commit(self._drop)
+
+    def _drop(self) -> None:
+        with self._lock:
+            self._by_name = None
+
+
+_name_caches: Dict[Tuple[str, str], NameCache] = {}
+_name_caches_lock = threading.Lock()
+
+
+def name_cache(table: str) -> NameCache:
+    """The shared cache for ``table`` in the current default database."""
+    key = (get_manager().db_path, table)
+    with _name_caches_lock:
+        cache = _name_caches.get(key)
+        if cache is None:
+            cache = _name_caches[key] = NameCache(table)
+    return cache
 
 
 class CategoryRepository:
@@ -12,11 +96,13 @@ class CategoryRepository:
         with db_cursor() as cur:
             cur.execute("INSERT INTO categories(name) VALUES (?)", (name,))
             new_id = cur.lastrowid
+        name_cache("categories").invalidate()
         return Category(id=new_id, name=name)
 
     def delete(self, category_id: int) -> None:
         with db_cursor() as cur:
             cur.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+        name_cache("categories").invalidate()
 
     def list_all(self) -> List[Category]:
         with db_cursor() as cur:
@@ -25,12 +111,22 @@ class CategoryRepository:
         return [Category(id=row["id"], name=row["name"]) for row in rows]
 
     def get_or_create(self, name: str) -> Category:
-        with db_cursor() as cur:
-            cur.execute("SELECT id, name FROM categories WHERE name = ?", (name,))
-            row = cur.fetchone()
-            if row:
-                return Category(id=row["id"], name=row["name"])
-        return self.create(name)
+        cache = name_cache("categories")
+        category_id = cache.id_for(name)
+        if category_id is not None:
+            return Category(id=category_id, name=name)
+        try:
+            return self.create(name)
+        except sqlite3.IntegrityError:
+            # Another connection added it since the cache was loaded.
+            category_id = cache.lookup(name)
+            if category_id is None:
+                raise
+            cache.invalidate()
+            return Category(id=category_id, name=name)
+
+    def names_by_id(self) -> Dict[int, str]:
+        return name_cache("categories").names_by_id()
 
 
 class PaymentMethodRepository:
@@ -41,17 +137,36 @@ class PaymentMethodRepository:
         return [PaymentMethod(id=row["id"], name=row["name"]) for row in rows]
 
     def get_or_create(self, name: str) -> PaymentMethod:
-        with db_cursor() as cur:
-            cur.execute("SELECT id, name FROM payment_methods WHERE name = ?", (name,))
-            row = cur.fetchone()
-            if row:
-                return PaymentMethod(id=row["id"], name=row["name"])
-            cur.execute("INSERT INTO payment_methods(name) VALUES (?)", (name,))
-            new_id = cur.lastrowid
+        cache = name_cache("payment_methods")
+        method_id = cache.id_for(name)
+        if method_id is not None:
+            return PaymentMethod(id=method_id, name=name)
+        try:
+            with db_cursor() as cur:
+                cur.execute("INSERT INTO payment_methods(name) VALUES (?)", (name,))
+                new_id = cur.lastrowid
+        except sqlite3.IntegrityError:
+            # Another connection added it since the cache was loaded.
+            new_id = cache.lookup(name)
+            if new_id is None:
+                raise
+        cache.invalidate()
         return PaymentMethod(id=new_id, name=name)
 
+    def names_by_id(self) -> Dict[int, str]:
+        return name_cache("payment_methods").names_by_id()
+
 
 class RecordRepository:
+    _ORDERINGS = {
+        "date_desc": ("date", "DESC"),
+        "date_asc": ("date", "ASC"),
+        "amount_desc": ("amount", "DESC"),
+        "amount_asc": ("amount", "ASC"),
+    }
+    # Column order of iter_export() rows.
+    EXPORT_COLUMNS = ("id", "type", "amount", "date", "payment_method_id", "category_id", "note", "created_at", "updated_at")
+
     def create(
         self,
         type_: str,
@@ -62,6 +177,7 @@ class RecordRepository:
         note: str,
     ) -> Record:
         now = datetime.utcnow().isoformat()
+        cents = to_cents(amount)
         with db_cursor() as cur:
             cur.execute(
                 """
@@ -70,7 +186,7 @@ class RecordRepository:
                 """,
                 (
                     type_,
-                    amount,
+                    cents,
                     date_.isoformat(),
                     payment_method_id,
                     category_id,
@@ -83,7 +199,7 @@ class RecordRepository:
         return Record(
             id=new_id,
             type=type_,
-            amount=amount,
+            amount=from_cents(cents),
             date=date_,
             payment_method_id=payment_method_id,
             category_id=category_id,
@@ -92,6 +208,41 @@ class RecordRepository:
             updated_at=datetime.fromisoformat(now),
         )
 
+    def bulk_create(
+        self,
+        rows: Iterable[Tuple[str, float, date, int, Optional[int], str]],
+        *,
+        batch_size: int = 5000,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """Insert ``(type, amount, date, payment_method_id, category_id, note)``
+        tuples with executemany in one transaction; returns the row count.
+        """
+        now = datetime.utcnow().isoformat()
+        sql = """
+            INSERT INTO records(type, amount, date, payment_method_id, category_id, note, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        count = 0
+        batch = []
+        with db_cursor() as cur:
+            for type_, amount, date_, payment_method_id, category_id, note in rows:
+                batch.append(
+                    (type_, to_cents(amount), date_.isoformat(), payment_method_id, category_id, note, now, now)
+                )
+                if len(batch) >= batch_size:
+                    cur.executemany(sql, batch)
+                    count += len(batch)
+                    batch.clear()
+                    if on_batch:
+                        on_batch(count)
+            if batch:
+                cur.executemany(sql, batch)
+                count += len(batch)
+                if on_batch:
+                    on_batch(count)
+        return count
+
     def update(
         self,
         record_id: int,
@@ -110,7 +261,7 @@ class RecordRepository:
             params.append(type_)
         if amount is not None:
             fields.append("amount = ?")
-            params.append(amount)
+            params.append(to_cents(amount))
         if date_ is not None:
             fields.append("date = ?")
             params.append(date_.isoformat())
@@ -135,6 +286,11 @@ class RecordRepository:
         with db_cursor() as cur:
             cur.execute("DELETE FROM records WHERE id = ?", (record_id,))
 
+    def delete_many(self, record_ids: Iterable[int]) -> int:
+        with db_cursor() as cur:
+            cur.executemany("DELETE FROM records WHERE id = ?", ((i,) for i in record_ids))
+            return cur.rowcount
+
     def list_recent(self, limit: int = 20) -> List[Record]:
         with db_cursor() as cur:
             cur.execute(
@@ -155,17 +311,423 @@ class RecordRepository:
         payment_method_id: Optional[int] = None,
         keyword: Optional[str] = None,
         type_: Optional[str] = None,
-        limit: int = 100,
+        limit: Optional[int] = 100,
         order_by: str = "date_desc",
     ) -> List[Record]:
+        return list(
+            self.iter_search(
+                min_amount=min_amount,
+                max_amount=max_amount,
+                start=start,
+                end=end,
+                category_id=category_id,
+                payment_method_id=payment_method_id,
+                keyword=keyword,
+                type_=type_,
+                limit=limit,
+                order_by=order_by,
+            )
+        )
+
+    def iter_search(
+        self,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        limit: Optional[int] = None,
+        order_by: str = "date_desc",
+        chunk_size: int = 1000,
+    ) -> Iterator[Record]:
+        """Like search(), but yields records in fetchmany chunks; no limit by default."""
+        sql, params = self.search_query(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+            limit=limit,
+            order_by=order_by,
+        )
+        with db_read_cursor() as cur:
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for r in rows:
+                    yield self._row_to_record(r)
+
+    def fetch_batch(
+        self,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        chunk_size: int = 10000,
+    ) -> RecordBatch:
+        """Matching records as a columnar RecordBatch (in no particular order), for analytics."""
+        sql, params = self.batch_query(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+        )
+        batch = RecordBatch()
+        with db_read_cursor() as cur:
+            cur.row_factory = None  # plain tuples; the columns are positional
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                batch.extend(rows)
+        return batch
+
+    def iter_export(
+        self,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        since_id: Optional[int] = None,
+        chunk_size: int = 5000,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Matching rows as plain tuples (EXPORT_COLUMNS) in id order, after ``since_id``."""
+        sql, params = self.export_query(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+            since_id=since_id,
+        )
+        with db_read_cursor() as cur:
+            cur.row_factory = None
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+
+    @classmethod
+    def export_query(
+        cls,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        since_id: Optional[int] = None,
+    ) -> Tuple[str, List[Any]]:
+        """SQL for iter_export().
+
+        Walking the table in rowid order streams without a sort step; an index
+        on a filter column would leave an ORDER BY id sort holding every
+        matching row, which is worse for exports than the extra rows scanned.
+        """
+        where, params = cls._filters(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+        )
+        if since_id is not None:
+            where.append("id > ?")
+            params.append(since_id)
+        sql = f"SELECT {', '.join(cls.EXPORT_COLUMNS)} FROM records NOT INDEXED"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql + " ORDER BY id", params
+
+    @classmethod
+    def batch_query(
+        cls,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """SQL for fetch_batch(); dates come back as proleptic Gregorian ordinals."""
+        where, params = cls._filters(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+        )
+        # julianday('0001-01-01') is 1721425.5 and date(1, 1, 1).toordinal() is 1.
+        sql = (
+            f"SELECT id, CASE type WHEN '{RECORD_TYPES[0]}' THEN 0 ELSE 1 END, amount, "
+            "CAST(julianday(date) - 1721424.5 AS INTEGER), payment_method_id, category_id "
+            "FROM records"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+
+    def search_page(
+        self,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        order_by: str = "date_desc",
+        page_size: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> RecordPage:
+        """Keyset pagination over search() results.
+
+        Tokens encode the ``(sort key, id)`` of a boundary row, so every page
+        is an index seek no matter how deep it is.
+        """
+        column = self._ORDERINGS.get(order_by, self._ORDERINGS["date_desc"])[0]
+        backward = before is not None
+        sql, params = self.page_query(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+            order_by=order_by,
+            page_size=page_size,
+            after=after,
+            before=before,
+        )
+        with db_cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        has_more = len(rows) > page_size
+        records = [self._row_to_record(r) for r in rows[:page_size]]
+        if backward:
+            records.reverse()
+        first = self._encode_token(records[0], column) if records else None
+        last = self._encode_token(records[-1], column) if records else None
+        if backward:
+            return RecordPage(records=records, next_token=last, prev_token=first if has_more else None)
+        return RecordPage(
+            records=records,
+            next_token=last if has_more else None,
+            prev_token=first if after is not None else None,
+        )
+
+    def list_recent_page(
+        self, page_size: int = 20, after: Optional[str] = None, before: Optional[str] = None
+    ) -> RecordPage:
+        return self.search_page(page_size=page_size, after=after, before=before)
+
+    def list_recent_at(
+        self, offset: int, page_size: int = 20, after: Optional[str] = None, from_end: bool = False
+    ) -> List[Record]:
+        """Records at positions [offset, offset + page_size) of the recent list.
+
+        Positions count from just past the ``after`` token, or, with
+        ``from_end``, backwards from the end of the list (``offset`` rows
+        follow the slice). OFFSET still steps through every skipped entry of
+        idx_records_date, so a jump costs O(offset); callers keep that short
+        by counting from a token near the target or from the nearer end.
+        """
+        if from_end and after is not None:
+            raise ValueError("after and from_end cannot be combined")
+        where, params = "", []
+        if after is not None:
+            key, record_id = self._decode_token(after, "date")
+            where, params = "WHERE (date, id) < (?, ?) ", [key, record_id]
+        direction = "ASC" if from_end else "DESC"
+        with db_read_cursor() as cur:
+            cur.execute(
+                f"SELECT * FROM records {where}ORDER BY date {direction}, id {direction} LIMIT ? OFFSET ?",
+                (*params, page_size, offset),
+            )
+            records = [self._row_to_record(r) for r in cur.fetchall()]
+        if from_end:
+            records.reverse()
+        return records
+
+    def position_in_recent(self, record: Record) -> int:
+        """Zero-based position of ``record`` in the recent list (date DESC, id DESC)."""
+        with db_read_cursor() as cur:
+            cur.execute(
+                "SELECT COUNT(*) FROM records WHERE (date, id) > (?, ?)",
+                (record.date.isoformat(), record.id),
+            )
+            return cur.fetchone()[0]
+
+    def count(self) -> int:
+        with db_read_cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM records")
+            return cur.fetchone()[0]
+
+    @classmethod
+    def token_for(cls, record: Record, order_by: str = "date_desc") -> str:
+        """Page token positioned at ``record``, as used for ``after``/``before``."""
+        column, _ = cls._ORDERINGS.get(order_by, cls._ORDERINGS["date_desc"])
+        return cls._encode_token(record, column)
+
+    @staticmethod
+    def _encode_token(record: Record, column: str) -> str:
+        key = record.date.isoformat() if column == "date" else str(to_cents(record.amount))
+        return f"{column}:{key}:{record.id}"
+
+    @staticmethod
+    def _decode_token(token: str, column: str) -> Tuple[Any, int]:
+        try:
+            token_column, key, record_id = token.rsplit(":", 2)
+            if token_column != column:
+                raise ValueError(token_column)
+            return (key if column == "date" else int(key)), int(record_id)
+        except ValueError:
+            raise ValueError(f"Invalid page token for {column} ordering: {token!r}") from None
+
+    @classmethod
+    def page_query(
+        cls,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        order_by: str = "date_desc",
+        page_size: int = 20,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """SQL for search_page(); fetches one extra row to detect more pages."""
+        column, direction = cls._ORDERINGS.get(order_by, cls._ORDERINGS["date_desc"])
+        where, params = cls._filters(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+        )
+        if before is not None:
+            direction = "ASC" if direction == "DESC" else "DESC"
+        token = before if before is not None else after
+        if token is not None:
+            key, record_id = cls._decode_token(token, column)
+            op = "<" if direction == "DESC" else ">"
+            where.append(f"({column}, id) {op} (?, ?)")
+            params.extend([key, record_id])
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        sql = (
+            f"SELECT * FROM records {where_clause} "
+            f"ORDER BY {column} {direction}, id {direction} LIMIT ?"
+        )
+        params.append(page_size + 1)
+        return sql, params
+
+    @classmethod
+    def search_query(
+        cls,
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category_id: Optional[int] = None,
+        payment_method_id: Optional[int] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        limit: Optional[int] = None,
+        order_by: str = "date_desc",
+    ) -> Tuple[str, List[Any]]:
+        where, params = cls._filters(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            category_id=category_id,
+            payment_method_id=payment_method_id,
+            keyword=keyword,
+            type_=type_,
+        )
+        column, direction = cls._ORDERINGS.get(order_by, cls._ORDERINGS["date_desc"])
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        sql = f"SELECT * FROM records {where_clause} ORDER BY {column} {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    @staticmethod
+    def _filters(
+        *,
+        min_amount: Optional[float],
+        max_amount: Optional[float],
+        start: Optional[date],
+        end: Optional[date],
+        category_id: Optional[int],
+        payment_method_id: Optional[int],
+        keyword: Optional[str],
+        type_: Optional[str],
+    ) -> Tuple[List[str], List[Any]]:
         where = []
-        params = []
+        params: List[Any] = []
         if min_amount is not None:
             where.append("amount >= ?")
-            params.append(min_amount)
+            params.append(to_cents(min_amount))
         if max_amount is not None:
             where.append("amount <= ?")
-            params.append(max_amount)
+            params.append(to_cents(max_amount))
         if start is not None:
             where.append("date >= ?")
             params.append(start.isoformat())
@@ -179,31 +741,24 @@ class RecordRepository:
             where.append("payment_method_id = ?")
             params.append(payment_method_id)
         if keyword:
-            where.append("note LIKE ?")
-            params.append(f"%{keyword}%")
+            if len(keyword) >= 3 and has_search_index():
+                # Trigram tokens need 3+ characters; quote as a phrase.
+                where.append("id IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)")
+                params.append('"' + keyword.replace('"', '""') + '"')
+            else:
+                where.append("note LIKE ?")
+                params.append(f"%{keyword}%")
         if type_ in ("income", "expense"):
             where.append("type = ?")
             params.append(type_)
-        order_clause = {
-            "date_desc": "date DESC, id DESC",
-            "date_asc": "date ASC, id ASC",
-            "amount_desc": "amount DESC",
-            "amount_asc": "amount ASC",
-        }.get(order_by, "date DESC, id DESC")
-        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
-        sql = f"SELECT * FROM records {where_clause} ORDER BY {order_clause} LIMIT ?"
-        params.append(limit)
-        with db_cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
-        return [self._row_to_record(r) for r in rows]
+        return where, params
 
     @staticmethod
     def _row_to_record(row) -> Record:
         return Record(
             id=row["id"],
             type=row["type"],
-            amount=row["amount"],
+            amount=from_cents(row["amount"]),
             date=date.fromisoformat(row["date"]),
             payment_method_id=row["payment_method_id"],
             category_id=row["category_id"],
@@ -213,24 +768,158 @@ class RecordRepository:
         )
 
 
+class StatsRepository:
+    """Grouped income/expense sums computed by SQLite instead of in Python."""
+
+    # Time bucket -> label expression over the ISO date text. Weeks are named
+    # by their Monday; plain prefixes stand in for strftime('%Y-%m') etc.
+    TIME_BUCKETS: Dict[str, str] = {
+        "day": "date",
+        "week": "date(date, '-6 days', 'weekday 1')",
+        "month": "substr(date, 1, 7)",
+        "quarter": "substr(date, 1, 4) || '-Q' || ((CAST(substr(date, 6, 2) AS INTEGER) + 2) / 3)",
+        "year": "substr(date, 1, 4)",
+    }
+
+    _GROUP_COLUMNS = {
+        "date": "date",
+        **TIME_BUCKETS,
+        "category": "category_id",
+        "method": "payment_method_id",
+    }
+
+    def totals_by(self, dimension: str, start: date, end: date) -> List[Tuple[Any, int, int]]:
+        """Return ``(key, income, expense)`` in cents per group for records in [start, end]."""
+        sql, params = self.totals_query(dimension, start, end)
+        with db_cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        return [(r["key"], r["income"], r["expense"]) for r in rows]
+
+    @classmethod
+    def totals_query(cls, dimension: str, start: date, end: date) -> Tuple[str, List[Any]]:
+        column = cls._GROUP_COLUMNS[dimension]
+        sql = f"""
+            SELECT {column} AS key,
+                   SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) AS income,
+                   SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) AS expense
+            FROM records
+            WHERE date >= ? AND date <= ?
+            GROUP BY key
+            ORDER BY key
+        """
+        if column != "date" and dimension in cls.TIME_BUCKETS:
+            # Sum per day along the date index first, then bucket the few
+            # day rows; far cheaper than evaluating the bucket for every record.
+            sql = f"""
+                SELECT {column} AS key, SUM(income) AS income, SUM(expense) AS expense
+                FROM (
+                    SELECT date,
+                           SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) AS income,
+                           SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) AS expense
+                    FROM records
+                    WHERE date >= ? AND date <= ?
+                    GROUP BY date
+                )
+                GROUP BY key
+                ORDER BY key
+            """
+        return sql, [start.isoformat(), end.isoformat()]
+
+    # Pivot dimension -> (key expression, join). Category and method keys come
+    # from a LEFT JOIN so deleted or missing ids share the single NULL key.
+    PIVOT_DIMENSIONS: Dict[str, Tuple[str, str]] = {
+        **{name: (expr, "") for name, expr in TIME_BUCKETS.items()},
+        "category": ("cat.id", "LEFT JOIN categories AS cat ON cat.id = records.category_id"),
+        "method": ("pm.id", "LEFT JOIN payment_methods AS pm ON pm.id = records.payment_method_id"),
+        "type": ("type", ""),
+    }
+    # Measures in cents (count excepted); amount is expense positive, income negative.
+    PIVOT_MEASURES: Dict[str, str] = {
+        "amount": "SUM(CASE WHEN type = 'expense' THEN amount ELSE -amount END)",
+        "income": "SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END)",
+        "expense": "SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END)",
+        "count": "COUNT(*)",
+    }
+
+    def pivot(
+        self,
+        rows: str,
+        cols: Optional[str],
+        measures: Sequence[str],
+        start: date,
+        end: date,
+        chunk_size: int = 1000,
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Yield ``(row_key, col_key, *measures)`` ordered by row then column key."""
+        sql, params = self.pivot_query(rows, cols, measures, start, end)
+        with db_read_cursor() as cur:
+            cur.row_factory = None
+            cur.execute(sql, params)
+            while True:
+                chunk = cur.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield from chunk
+
+    @classmethod
+    def pivot_query(
+        cls, rows: str, cols: Optional[str], measures: Sequence[str], start: date, end: date
+    ) -> Tuple[str, List[Any]]:
+        dimensions = [rows] if cols is None else [rows, cols]
+        for name in dimensions:
+            if name not in cls.PIVOT_DIMENSIONS:
+                raise ValueError(f"Unknown pivot dimension: {name}")
+        for name in measures:
+            if name not in cls.PIVOT_MEASURES:
+                raise ValueError(f"Unknown pivot measure: {name}")
+        row_key, row_join = cls.PIVOT_DIMENSIONS[rows]
+        col_key, col_join = cls.PIVOT_DIMENSIONS[cols] if cols is not None else ("NULL", "")
+        joins = " ".join(j for j in dict.fromkeys((row_join, col_join)) if j)
+        select = ", ".join(cls.PIVOT_MEASURES[m] for m in measures)
+        sql = f"""
+            SELECT {row_key} AS row_key, {col_key} AS col_key, {select}
+            FROM records {joins}
+            WHERE date >= ? AND date <= ?
+            GROUP BY row_key, col_key
+            ORDER BY row_key, col_key
+        """
+        return sql, [start.isoformat(), end.isoformat()]
+
+    def monthly_category_totals(self, month: str, type_: str) -> Dict[int, int]:
+        """Totals in cents per category_id (0 = uncategorized) from the rollup table."""
+        with db_cursor() as cur:
+            cur.execute(*self.monthly_category_totals_query(month, type_))
+            rows = cur.fetchall()
+        return {r["category_id"]: r["total"] for r in rows}
+
+    @staticmethod
+    def monthly_category_totals_query(month: str, type_: str) -> Tuple[str, List[Any]]:
+        return (
+            "SELECT category_id, total FROM monthly_category_totals WHERE month = ? AND type = ?",
+            [month, type_],
+        )
+
+
 class BudgetRepository:
     def upsert_budget(self, month: str, total: float, threshold: float) -> Budget:
+        cents = to_cents(total)
         with db_cursor() as cur:
             cur.execute("SELECT id FROM budgets WHERE month = ?", (month,))
             row = cur.fetchone()
             if row:
                 cur.execute(
                     "UPDATE budgets SET total = ?, threshold = ? WHERE id = ?",
-                    (total, threshold, row["id"]),
+                    (cents, threshold, row["id"]),
                 )
                 budget_id = row["id"]
             else:
                 cur.execute(
                     "INSERT INTO budgets(month, total, threshold) VALUES (?, ?, ?)",
-                    (month, total, threshold),
+                    (month, cents, threshold),
                 )
                 budget_id = cur.lastrowid
-        return Budget(id=budget_id, month=month, total=total, threshold=threshold)
+        return Budget(id=budget_id, month=month, total=from_cents(cents), threshold=threshold)
 
     def set_category_amount(self, budget_id: int, category_id: int, amount: float) -> None:
         with db_cursor() as cur:
@@ -242,12 +931,12 @@ class BudgetRepository:
             if row:
                 cur.execute(
                     "UPDATE budget_items SET amount = ? WHERE id = ?",
-                    (amount, row["id"]),
+                    (to_cents(amount), row["id"]),
                 )
             else:
                 cur.execute(
                     "INSERT INTO budget_items(budget_id, category_id, amount) VALUES (?, ?, ?)",
-                    (budget_id, category_id, amount),
+                    (budget_id, category_id, to_cents(amount)),
                 )
 
     def get_budget_by_month(self, month: str) -> Optional[Budget]:
@@ -257,7 +946,7 @@ class BudgetRepository:
             if not row:
                 return None
         return Budget(
-            id=row["id"], month=row["month"], total=row["total"], threshold=row["threshold"]
+            id=row["id"], month=row["month"], total=from_cents(row["total"]), threshold=row["threshold"]
         )
 
     def list_budget_items(self, budget_id: int) -> List[BudgetItem]:
@@ -269,7 +958,10 @@ class BudgetRepository:
             rows = cur.fetchall()
         return [
             BudgetItem(
-                id=r["id"], budget_id=r["budget_id"], category_id=r["category_id"], amount=r["amount"]
+                id=r["id"],
+                budget_id=r["budget_id"],
+                category_id=r["category_id"],
+                amount=from_cents(r["amount"]),
             )
             for r in rows
         ]
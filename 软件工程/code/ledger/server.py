@@ -0,0 +1,313 @@
+"""Long-running local server: one warm process answering JSON requests.
+
+Every CLI invocation pays for interpreter start-up, imports, migrate() and a
+new connection. ``ledger serve`` pays that once and then answers requests on
+a Unix socket (TCP on 127.0.0.1 where Unix sockets are unavailable). The
+protocol is newline-delimited JSON::
+
+    -> {"id": 1, "method": "records.list_page", "params": {"page_size": 20}}
+    <- {"id": 1, "result": {"records": [...], "next_token": "...", "prev_token": null}}
+    <- {"id": 2, "error": {"type": "ValueError", "message": "..."}}
+
+``method`` is ``<service>.<operation>`` from ``METHODS``; ``params`` are the
+operation's keyword arguments (``args`` may carry positional ones), with dates
+as ISO strings. Results are the return values with dataclasses as objects and
+dates as ISO strings. ``cli.run`` runs a CLI command line and returns its
+output, which is how ``ledger --server`` routes commands.
+
+Over TCP every request must also carry ``"token"``: a random secret the
+server writes to a file only the current user can read (client.token_path(),
+or LEDGER_SERVER_TOKEN on both sides), and peers must be loopback addresses.
+A Unix socket is protected by its 0600 mode instead. A line that is not a
+well-formed request, or lacks the token, gets one error reply and the
+connection is closed, so an HTTP request or other stray traffic is never
+read past its first line.
+
+Reads, and read-only CLI commands (cli.READ_ONLY_COMMANDS), run on a pool of
+reader threads, each keeping its own connection open. Writes and the other
+CLI commands run one at a time on a single writer thread, so they never wait
+on each other for the SQLite write lock.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hmac
+import io
+import ipaddress
+import json
+import os
+import secrets
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import click
+
+from .cli import COMMANDS, LOCAL_COMMANDS, READ_ONLY_COMMANDS, cli as cli_group
+from .client import LedgerClient, parse_address, token_path
+from .database import SCHEMA_VERSION, get_manager
+from .output import OUTPUT_FORMATS
+from .services import BudgetService, CategoryService, RecordService
+from .stats import StatsService
+from .utils import parse_date
+
+# service name -> (factory, read operations, write operations)
+METHODS: Dict[str, Tuple[Callable[[], Any], Tuple[str, ...], Tuple[str, ...]]] = {
+    "records": (
+        RecordService,
+        ("list_recent", "iter_recent", "list_page", "list_window", "count_records"),
+        ("add_record", "add_records", "import_records", "update_record", "delete_record", "delete_records"),
+    ),
+    "categories": (CategoryService, ("list",), ("add", "delete")),
+    "budgets": (BudgetService, ("progress",), ("set_budget", "set_category_budget")),
+    "stats": (StatsService, ("stats_by_time", "stats_by_category", "stats_by_method", "pivot"), ()),
+}
+# Parameters that the services take as datetime.date.
+_DATE_PARAMS = frozenset(("date_", "start", "end"))
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+def _decode_params(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: parse_date(v) if k in _DATE_PARAMS and isinstance(v, str) else _decode_params(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_decode_params(v) for v in value]
+    return value
+
+
+def to_json(value: Any) -> Any:
+    """Plain JSON data for a service result; iterators are drained into lists."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, date):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: to_json(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    return [to_json(v) for v in value]
+
+
+class BadRequest(ValueError):
+    """A line that is not a well-formed, authorized request; the connection is closed."""
+
+
+def check_cli_args(args: Any, output_format: Any) -> None:
+    """Only named, non-local commands may run in the server (see cli.LOCAL_COMMANDS)."""
+    if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+        raise ValueError("cli.run args must be a list of strings")
+    if not args or args[0] not in COMMANDS or args[0] in LOCAL_COMMANDS:
+        raise ValueError(f"Command not available through the server: {args[0] if args else ''!r}")
+    if "--help" in args:
+        raise ValueError("Help is rendered by the client, not the server")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format!r}")
+
+
+def run_cli(args: Sequence[str], output_format: str = "table") -> Dict[str, Any]:
+    """Run ``ledger --format <output_format> <args>`` in-process; stdout, stderr and the exit code come back.
+
+    Output goes to buffers of this request's own (see output.stream()), so
+    runs on different pool threads never touch the process's sys.stdout.
+    """
+    check_cli_args(list(args), output_format)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    try:
+        # The group callback skips migrate() and close_all() for served runs.
+        rv = cli_group.main(
+            ["--format", output_format, *args],
+            prog_name="ledger",
+            standalone_mode=False,
+            obj={"served": True, "stdout": stdout, "stderr": stderr},
+        )
+        exit_code = rv if isinstance(rv, int) else 0
+    except click.ClickException as exc:
+        exc.show(file=stderr)
+        exit_code = exc.exit_code
+    except click.Abort:
+        stderr.write("Aborted!\n")
+        exit_code = 1
+    except SystemExit as exc:
+        exit_code = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+    except Exception as exc:  # noqa: BLE001 - reported like an uncaught CLI error
+        stderr.write(f"{type(exc).__name__}: {exc}\n")
+        exit_code = 1
+    return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+class LedgerServer:
+    def __init__(self, address: Optional[str] = None, readers: int = 4) -> None:
+        self.family, self.target = parse_address(address)
+        self.readers = readers
+        self._services = {name: factory() for name, (factory, _, _) in METHODS.items()}
+        self._read_pool = ThreadPoolExecutor(readers, thread_name_prefix="ledger-reader")
+        self._write_pool = ThreadPoolExecutor(1, thread_name_prefix="ledger-writer")
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopping = False
+        self._token: Optional[str] = None
+        if self.family == "tcp":
+            self._token = os.environ.get("LEDGER_SERVER_TOKEN") or secrets.token_urlsafe(32)
+
+    @property
+    def address(self) -> str:
+        if self.family == "unix":
+            return f"unix:{self.target}"
+        host, port = self.target
+        return f"tcp:{host}:{port}"
+
+    def _warm(self) -> None:
+        # Open a connection on every pool thread now, not on its first request.
+        barrier = threading.Barrier(self.readers)
+
+        def open_connection() -> None:
+            get_manager().connection()
+            barrier.wait(timeout=5)
+
+        for future in [self._read_pool.submit(open_connection) for _ in range(self.readers)]:
+            future.result()
+        self._write_pool.submit(get_manager().connection).result()
+
+    async def start(self) -> None:
+        self._warm()
+        if self.family == "unix":
+            if os.path.exists(self.target):
+                try:
+                    LedgerClient(self.address, timeout=1).close()
+                except OSError:
+                    os.unlink(self.target)  # left over from a server that did not shut down cleanly
+                else:
+                    raise RuntimeError(f"A server is already listening on {self.address}")
+            self._server = await asyncio.start_unix_server(self._handle, self.target, limit=MAX_REQUEST_BYTES)
+            os.chmod(self.target, 0o600)
+        else:
+            host, port = self.target
+            self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_REQUEST_BYTES)
+            self._write_token()
+
+    def _write_token(self) -> None:
+        path = token_path()
+        if os.path.exists(path):
+            os.unlink(path)  # recreate, so the mode below applies
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(self._token)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        except asyncio.CancelledError:
+            if not self._stopping:
+                raise
+        finally:
+            self.close()
+
+    def stop(self) -> None:
+        """Stop serving_forever() from the event loop's thread, e.g. on SIGTERM."""
+        self._stopping = True
+        if self._server is not None:
+            self._server.close()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        if self.family == "unix" and os.path.exists(self.target):
+            os.unlink(self.target)
+        if self._token is not None and self._server is not None and os.path.exists(token_path()):
+            os.unlink(token_path())
+        self._read_pool.shutdown(wait=False, cancel_futures=True)
+        self._write_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            if self.family == "tcp" and not _is_loopback(writer.get_extra_info("peername")):
+                return
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(self._encode({"id": None, "error": {"type": "BadRequest", "message": "Request too large"}}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response, keep_open = await self._respond(line)
+                writer.write(self._encode(response))
+                await writer.drain()
+                if not keep_open:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _parse(self, line: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(line)
+        except ValueError as exc:
+            raise BadRequest(f"Not a JSON request: {exc}") from exc
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            raise BadRequest("Request must be a JSON object with a method")
+        if not isinstance(request.get("args", []), list) or not isinstance(request.get("params", {}), dict):
+            raise BadRequest("args must be a list and params an object")
+        if self._token is not None:
+            token = request.get("token")
+            if not isinstance(token, str) or not hmac.compare_digest(token, self._token):
+                raise BadRequest("Missing or invalid token")
+        return request
+
+    async def _respond(self, line: bytes) -> Tuple[Dict[str, Any], bool]:
+        """The response to one line, and whether to keep reading the connection."""
+        request_id = None
+        try:
+            request = self._parse(line)
+            request_id = request.get("id")
+            pool, call = self._resolve(request)
+            result = await asyncio.get_running_loop().run_in_executor(pool, call)
+            return {"id": request_id, "result": result}, True
+        except BadRequest as exc:
+            return {"id": request_id, "error": {"type": "BadRequest", "message": str(exc)}}, False
+        except Exception as exc:  # noqa: BLE001 - reported to the client
+            error = {"type": type(exc).__name__, "message": str(exc)}
+            if not isinstance(exc, (ValueError, KeyError, TypeError)):
+                error["traceback"] = traceback.format_exc()
+            return {"id": request_id, "error": error}, True
+
+    def _resolve(self, request: Dict[str, Any]) -> Tuple[ThreadPoolExecutor, Callable[[], Any]]:
+        method = request.get("method")
+        args = _decode_params(request.get("args") or [])
+        params = _decode_params(request.get("params") or {})
+        if method == "server.ping":
+            return self._read_pool, lambda: {"schema_version": SCHEMA_VERSION, "pid": os.getpid()}
+        if method == "cli.run":
+            cli_args, output_format = params.get("args", args), params.get("format", "table")
+            check_cli_args(cli_args, output_format)
+            pool = self._read_pool if cli_args[0] in READ_ONLY_COMMANDS else self._write_pool
+            return pool, lambda: run_cli(cli_args, output_format)
+        service, _, operation = method.partition(".")
+        if service not in METHODS or operation not in METHODS[service][1] + METHODS[service][2]:
+            raise ValueError(f"Unknown method: {method}")
+        fn = getattr(self._services[service], operation)
+        pool = self._write_pool if operation in METHODS[service][2] else self._read_pool
+        return pool, lambda: to_json(fn(*args, **params))
+
+    @staticmethod
+    def _encode(response: Dict[str, Any]) -> bytes:
+        return json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _is_loopback(peername: Any) -> bool:
+    try:
+        return ipaddress.ip_address(peername[0]).is_loopback
+    except (TypeError, ValueError, IndexError):
+        return False
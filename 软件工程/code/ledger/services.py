@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Dict, List, Optional, Tuple
+from typing import IO, Any, Callable, Iterable, Iterator, List, Mapping, Optional, Tuple
 
-from .models import Budget, BudgetProgress, Category, Record
-from .repositories import BudgetRepository, CategoryRepository, PaymentMethodRepository, RecordRepository
-from .utils import clamp
+from .database import transaction
+from .models import Budget, BudgetProgress, Category, ExportResult, Record, RecordPage, from_cents
+from .repositories import (
+    BudgetRepository,
+    CategoryRepository,
+    PaymentMethodRepository,
+    RecordRepository,
+    StatsRepository,
+)
+from .utils import clamp, parse_date, parse_month
 
 
 class CategoryService:
@@ -38,18 +45,123 @@ class RecordService:
         category: Optional[str],
         note: str,
     ) -> Record:
-        method = self._methods.get_or_create(payment_method)
-        category_id = None
-        if category:
-            category_id = self._categories.get_or_create(category).id
-        return self._records.create(
+        with transaction():
+            method = self._methods.get_or_create(payment_method)
+            category_id = None
+            if category:
+                category_id = self._categories.get_or_create(category).id
+            return self._records.create(
+                type_=type_,
+                amount=amount,
+                date_=date_,
+                payment_method_id=method.id or 0,
+                category_id=category_id,
+                note=note,
+            )
+
+    def add_records(self, items: Iterable[Mapping[str, Any]]) -> List[Record]:
+        """Add several records (add_record keyword arguments) in one transaction."""
+        with transaction():
+            return [self.add_record(**item) for item in items]
+
+    def import_records(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        batch_size: int = 5000,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """Import rows keyed like fileio.IMPORT_FIELDS in a single transaction.
+
+        Category and payment-method names are resolved through in-memory maps,
+        so only names not seen before touch the database.
+        """
+        method_ids = {m.name: m.id for m in self._methods.list_all()}
+        category_ids = {c.name: c.id for c in self._categories.list_all()}
+
+        def resolve() -> Iterator[Tuple[str, float, date, int, Optional[int], str]]:
+            for line_no, row in enumerate(rows, 1):
+                type_ = (row.get("type") or "").strip()
+                if type_ not in ("income", "expense"):
+                    raise ValueError(f"Row {line_no}: invalid type {type_!r}")
+                try:
+                    amount = float(row["amount"])
+                    date_ = parse_date(str(row["date"]).strip())
+                except (KeyError, TypeError, ValueError) as exc:
+                    raise ValueError(f"Row {line_no}: {exc}") from exc
+                method = (row.get("method") or "").strip()
+                if not method:
+                    raise ValueError(f"Row {line_no}: missing method")
+                if method not in method_ids:
+                    method_ids[method] = self._methods.get_or_create(method).id
+                category = (row.get("category") or "").strip()
+                category_id = None
+                if category:
+                    if category not in category_ids:
+                        category_ids[category] = self._categories.get_or_create(category).id
+                    category_id = category_ids[category]
+                yield (type_, amount, date_, method_ids[method] or 0, category_id, row.get("note") or "")
+
+        with transaction():
+            return self._records.bulk_create(resolve(), batch_size=batch_size, on_batch=on_progress)
+
+    def export(
+        self,
+        fh: IO[str],
+        fmt: str = "csv",
+        *,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        keyword: Optional[str] = None,
+        type_: Optional[str] = None,
+        since_id: Optional[int] = None,
+        header: bool = True,
+        on_progress: Optional[Callable[[int], None]] = None,
+        progress_every: int = 100000,
+    ) -> ExportResult:
+        """Write matching records to ``fh`` as CSV or JSON Lines (fileio.EXPORT_FIELDS).
+
+        Rows go from the cursor to the writer a fetchmany chunk at a time, in id
+        order, so memory stays flat however many rows match. Pass the returned
+        ``last_id`` as ``since_id`` to resume an interrupted export.
+        """
+        from .fileio import EXPORT_FIELDS, row_writer  # csv/json/gzip only load for exports
+
+        write = row_writer(fh, fmt, EXPORT_FIELDS, header=header)
+        methods = self._methods.names_by_id()
+        categories = self._categories.names_by_id()
+        count = 0
+        last_id = since_id
+        rows = self._records.iter_export(
+            min_amount=min_amount,
+            max_amount=max_amount,
+            start=start,
+            end=end,
+            keyword=keyword,
             type_=type_,
-            amount=amount,
-            date_=date_,
-            payment_method_id=method.id or 0,
-            category_id=category_id,
-            note=note,
+            since_id=since_id,
         )
+        for id_, kind, cents, date_, method_id, category_id, note, created_at, updated_at in rows:
+            write(
+                (
+                    id_,
+                    kind,
+                    from_cents(cents),
+                    date_,
+                    methods.get(method_id, ""),
+                    categories.get(category_id, ""),
+                    note or "",
+                    created_at,
+                    updated_at,
+                )
+            )
+            count += 1
+            last_id = id_
+            if on_progress is not None and count % progress_every == 0:
+                on_progress(count)
+        return ExportResult(count=count, last_id=last_id)
 
     def update_record(
         self,
@@ -64,32 +176,60 @@ class RecordService:
     ) -> None:
         payment_method_id = None
         category_id: Optional[Optional[int]] = None
-        if payment_method is not None:
-            payment_method_id = self._methods.get_or_create(payment_method).id
-        if category is not None:
-            category_id = self._categories.get_or_create(category).id if category else None
-        self._records.update(
-            record_id,
-            type_=type_,
-            amount=amount,
-            date_=date_,
-            payment_method_id=payment_method_id,
-            category_id=category_id,
-            note=note,
-        )
+        with transaction():
+            if payment_method is not None:
+                payment_method_id = self._methods.get_or_create(payment_method).id
+            if category is not None:
+                category_id = self._categories.get_or_create(category).id if category else None
+            self._records.update(
+                record_id,
+                type_=type_,
+                amount=amount,
+                date_=date_,
+                payment_method_id=payment_method_id,
+                category_id=category_id,
+                note=note,
+            )
 
     def delete_record(self, record_id: int) -> None:
         self._records.delete(record_id)
 
+    def delete_records(self, record_ids: Iterable[int]) -> int:
+        """Delete several records in one transaction; returns the number deleted."""
+        with transaction():
+            return self._records.delete_many(record_ids)
+
     def list_recent(self, limit: int = 20) -> List[Record]:
         return self._records.list_recent(limit=limit)
 
+    def iter_recent(self, limit: Optional[int] = None) -> Iterator[Record]:
+        return self._records.iter_search(limit=limit)
+
+    def list_page(
+        self, page_size: int = 20, after: Optional[str] = None, before: Optional[str] = None
+    ) -> RecordPage:
+        return self._records.list_recent_page(page_size=page_size, after=after, before=before)
+
+    def list_window(
+        self, offset: int, size: int = 200, after: Optional[str] = None, from_end: bool = False
+    ) -> List[Record]:
+        return self._records.list_recent_at(offset, page_size=size, after=after, from_end=from_end)
+
+    def count_records(self) -> int:
+        return self._records.count()
+
+    def position_of(self, record: Record) -> int:
+        return self._records.position_in_recent(record)
+
+    def page_token(self, record: Record) -> str:
+        return self._records.token_for(record)
+
 
 class BudgetService:
     def __init__(self) -> None:
         self._budgets = BudgetRepository()
         self._categories = CategoryRepository()
-        self._records = RecordRepository()
+        self._stats = StatsRepository()
 
     def set_budget(self, month: str, total: float, threshold: float) -> Budget:
         threshold = clamp(threshold, 0.0, 1.0)
@@ -99,36 +239,24 @@ class BudgetService:
         budget = self._budgets.get_budget_by_month(month)
         if not budget:
             raise ValueError("Budget for month not set. Call set_budget first.")
-        cat = self._categories.get_or_create(category)
-        self._budgets.set_category_amount(budget.id or 0, cat.id or 0, amount)
+        with transaction():
+            cat = self._categories.get_or_create(category)
+            self._budgets.set_category_amount(budget.id or 0, cat.id or 0, amount)
 
     def progress(self, month: str) -> BudgetProgress:
+        month = parse_month(month)
         budget = self._budgets.get_budget_by_month(month)
         if not budget:
             budget = Budget(id=None, month=month, total=0.0, threshold=0.8)
-        # Aggregate expenses in month
-        start = date.fromisoformat(month + "-01")
-        # naive month-end: get next month first day - 1; keep simple for CLI
-        year, mm = map(int, month.split("-"))
-        if mm == 12:
-            end = date(year + 1, 1, 31)
-        else:
-            end = date(year, mm + 1, 31)
-        expenses = self._records.search(
-            type_="expense", start=start, end=end, limit=100000
-        )
-        total_expense = sum(r.amount for r in expenses)
-        by_category_map: Dict[int, float] = {}
-        for r in expenses:
-            if r.category_id is None:
-                continue
-            by_category_map[r.category_id] = by_category_map.get(r.category_id, 0.0) + r.amount
+        # Expenses per category come from the trigger-maintained monthly rollup.
+        by_category_map = self._stats.monthly_category_totals(month, "expense")
+        total_expense = from_cents(sum(by_category_map.values()))
 
         items = self._budgets.list_budget_items(budget.id or -1) if budget.id else []
-        id_to_name = {c.id: c.name for c in self._categories.list_all()}
+        id_to_name = self._categories.names_by_id()
         by_category = []
         for item in items:
-            used = by_category_map.get(item.category_id, 0.0)
+            used = from_cents(by_category_map.get(item.category_id, 0))
             name = id_to_name.get(item.category_id, f"分类{item.category_id}")
             by_category.append((name, item.amount, used))
         usage_ratio = 0.0 if budget.total <= 0 else total_expense / budget.total
@@ -1,74 +1,182 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from .models import StatsResult
-from .repositories import CategoryRepository, PaymentMethodRepository, RecordRepository
+from . import vectorized
+from .models import PivotTable, StatsResult, from_cents
+from .repositories import CategoryRepository, PaymentMethodRepository, RecordRepository, StatsRepository
+from .utils import TIME_BUCKETS, time_buckets
+
+ENGINES = ("sql", "numpy")
+PIVOT_DIMENSIONS = tuple(StatsRepository.PIVOT_DIMENSIONS)
+PIVOT_MEASURES = tuple(StatsRepository.PIVOT_MEASURES)
+# Label of keys with no name (deleted or NULL) per named dimension.
+_UNKNOWN_LABELS = {"category": "未分类", "method": "Unknown"}
 
 
 class StatsService:
-    def __init__(self) -> None:
+    """Income/expense summaries.
+
+    ``engine`` picks how groups are summed. "sql" (the default) runs GROUP BY
+    over covering indexes in SQLite. "numpy" loads a RecordBatch and groups
+    it with NumPy; it needs NumPy installed. Both return identical results.
+    """
+
+    def __init__(self, engine: Optional[str] = None) -> None:
+        engine = engine or "sql"
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown stats engine: {engine}")
+        if engine == "numpy" and not vectorized.HAS_NUMPY:
+            raise ValueError("NumPy is not installed; the numpy stats engine is unavailable")
+        self.engine = engine
+        self._stats = StatsRepository()
         self._records = RecordRepository()
         self._categories = CategoryRepository()
         self._methods = PaymentMethodRepository()
 
-    def stats_by_time(self, start: date, end: date) -> StatsResult:
-        recs = self._records.search(start=start, end=end, limit=100000)
-        by_day: Dict[str, float] = {}
-        income = 0.0
-        expense = 0.0
-        for r in recs:
-            by_day[r.date.isoformat()] = by_day.get(r.date.isoformat(), 0.0) + (
-                r.amount if r.type == "expense" else -r.amount
-            )
-            if r.type == "income":
-                income += r.amount
-            else:
-                expense += r.amount
-        items = sorted(by_day.items(), key=lambda x: x[0])
-        return StatsResult(
-            dimension="time", period=(start, end), items=items, total_income=income, total_expense=expense
-        )
+    def stats_by_time(
+        self, start: date, end: date, granularity: str = "day", fill_gaps: bool = True
+    ) -> StatsResult:
+        """Totals per day/week/month/quarter/year bucket, bucketed by SQLite.
+
+        With ``fill_gaps`` every bucket in the range is listed, empty ones as 0.
+        """
+        if granularity not in TIME_BUCKETS:
+            raise ValueError(f"Unknown time bucket: {granularity}")
+        fill = time_buckets(granularity, start, end) if fill_gaps else ()
+        return self._summarize("time", granularity, start, end, str, by_label=True, fill=fill)
 
     def stats_by_category(self, start: date, end: date) -> StatsResult:
-        recs = self._records.search(start=start, end=end, limit=100000)
-        id_to_name = {c.id: c.name for c in self._categories.list_all()}
-        by_cat: Dict[str, float] = {}
-        income = 0.0
-        expense = 0.0
-        for r in recs:
-            key = id_to_name.get(r.category_id, "未分类")
-            by_cat[key] = by_cat.get(key, 0.0) + (r.amount if r.type == "expense" else -r.amount)
-            if r.type == "income":
-                income += r.amount
-            else:
-                expense += r.amount
-        items = sorted(by_cat.items(), key=lambda x: x[1], reverse=True)
-        return StatsResult(
-            dimension="category", period=(start, end), items=items, total_income=income, total_expense=expense
+        id_to_name = self._categories.names_by_id()
+        return self._summarize(
+            "category", "category", start, end, lambda key: id_to_name.get(key, "未分类")
         )
 
     def stats_by_method(self, start: date, end: date) -> StatsResult:
-        recs = self._records.search(start=start, end=end, limit=100000)
-        id_to_name = {m.id: m.name for m in self._methods.list_all()}
-        by_method: Dict[str, float] = {}
-        income = 0.0
-        expense = 0.0
-        for r in recs:
-            key = id_to_name.get(r.payment_method_id, "Unknown")
-            by_method[key] = by_method.get(key, 0.0) + (r.amount if r.type == "expense" else -r.amount)
-            if r.type == "income":
-                income += r.amount
-            else:
-                expense += r.amount
-        items = sorted(by_method.items(), key=lambda x: x[1], reverse=True)
+        id_to_name = self._methods.names_by_id()
+        return self._summarize(
+            "payment_method", "method", start, end, lambda key: id_to_name.get(key, "Unknown")
+        )
+
+    def _totals_by(self, group_by: str, start: date, end: date) -> List[Tuple[Any, int, int]]:
+        if self.engine == "numpy":
+            return vectorized.totals_by(self._records.fetch_batch(start=start, end=end), group_by)
+        return self._stats.totals_by(group_by, start, end)
+
+    def _summarize(
+        self,
+        dimension: str,
+        group_by: str,
+        start: date,
+        end: date,
+        label: Callable[[Any], str],
+        by_label: bool = False,
+        fill: Iterable[str] = (),
+    ) -> StatsResult:
+        # Several keys may share a label (e.g. deleted categories -> 未分类).
+        # Sums stay in integer cents until the result is built.
+        by_key: Dict[str, int] = {}
+        income = 0
+        expense = 0
+        for key, group_income, group_expense in self._totals_by(group_by, start, end):
+            name = label(key)
+            by_key[name] = by_key.get(name, 0) + group_expense - group_income
+            income += group_income
+            expense += group_expense
+        for name in fill:
+            by_key.setdefault(name, 0)
+        items: List[Tuple[str, float]]
+        if by_label:
+            items = [(k, from_cents(v)) for k, v in sorted(by_key.items(), key=lambda x: x[0])]
+        else:
+            items = [(k, from_cents(v)) for k, v in sorted(by_key.items(), key=lambda x: x[1], reverse=True)]
         return StatsResult(
-            dimension="payment_method",
+            dimension=dimension,
             period=(start, end),
             items=items,
-            total_income=income,
-            total_expense=expense,
+            total_income=from_cents(income),
+            total_expense=from_cents(expense),
         )
 
+    def pivot(
+        self,
+        rows: str,
+        cols: Optional[str] = None,
+        measures: Sequence[str] = ("amount",),
+        *,
+        start: date,
+        end: date,
+    ) -> PivotTable:
+        """Cross-tabulate records in [start, end] with one grouped query.
+
+        Dimensions are the time buckets (day/week/month/quarter/year), category, method and
+        type; measures are amount (支出正/收入负), income, expense and count.
+        Column labels come from the name caches or from the date range, so
+        rows can be streamed while the query is still running.
+        """
+        if cols == rows:
+            raise ValueError("Pivot rows and cols must differ")
+        measures = tuple(measures)
+        if not measures:
+            raise ValueError("At least one pivot measure is required")
+        # One name lookup per dimension, so labels and columns always agree
+        # even if a category or method is created while rows stream.
+        row_label, _ = self._pivot_axis(rows, start, end, with_columns=False)
+        col_label, columns = self._pivot_axis(cols, start, end) if cols else (None, [])
+        source = self._stats.pivot(rows, cols, measures, start, end)
+        return PivotTable(
+            rows_dimension=rows,
+            cols_dimension=cols,
+            measures=measures,
+            period=(start, end),
+            columns=columns,
+            rows=self._pivot_rows(source, row_label, col_label, columns, measures, _UNKNOWN_LABELS.get(cols)),
+        )
+
+    def _pivot_axis(
+        self, dimension: str, start: date, end: date, with_columns: bool = True
+    ) -> Tuple[Callable[[Any], str], List[str]]:
+        """Label function and column labels for ``dimension``."""
+        if dimension in ("category", "method"):
+            repo = self._categories if dimension == "category" else self._methods
+            names = repo.names_by_id()
+            unknown = _UNKNOWN_LABELS[dimension]
+            columns = [name for _, name in sorted(names.items())] + [unknown] if with_columns else []
+            return (lambda key: names.get(key, unknown)), columns
+        if not with_columns:
+            return str, []
+        if dimension == "type":
+            return str, ["expense", "income"]
+        return str, list(time_buckets(dimension, start, end))
+
+    @staticmethod
+    def _pivot_rows(
+        source: Iterator[Tuple[Any, ...]],
+        row_label: Callable[[Any], str],
+        col_label: Optional[Callable[[Any], str]],
+        columns: List[str],
+        measures: Tuple[str, ...],
+        fallback: Optional[str] = None,
+    ) -> Iterator[Tuple[str, List[float]]]:
+        width = len(measures)
+        slots = {name: i * width for i, name in enumerate(columns)} if col_label else {None: 0}
+        # Labels missing from the columns fall into the ``fallback`` (未分类/Unknown) slot.
+        unknown = slots.get(fallback)
+        convert = [(lambda v: v) if m == "count" else from_cents for m in measures]
+        current: Any = object()
+        values: List[Any] = []
+        for row_key, col_key, *cells in source:
+            if row_key != current:
+                if values:
+                    yield row_label(current), [convert[i % width](v) for i, v in enumerate(values)]
+                current = row_key
+                values = [0] * (width * len(slots))
+            offset = slots.get(col_label(col_key), unknown) if col_label else 0
+            if offset is None:
+                raise KeyError(f"Pivot column {col_label(col_key)!r} is outside the requested range")
+            for i, cell in enumerate(cells):
+                values[offset + i] += cell or 0
+        if values:
+            yield row_label(current), [convert[i % width](v) for i, v in enumerate(values)]
 
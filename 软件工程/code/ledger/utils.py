@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Iterator, Optional
+
+# Time bucket labels match StatsRepository.TIME_BUCKETS: weeks are named by
+# their Monday, quarters as YYYY-Qn.
+TIME_BUCKETS = ("day", "week", "month", "quarter", "year")
 
 
 def parse_date(value: str) -> date:
@@ -18,3 +22,38 @@ def clamp(value: float, min_value: float, max_value: float) -> float:
     return max(min_value, min(value, max_value))
 
 
+def time_bucket(d: date, granularity: str) -> str:
+    if granularity == "day":
+        return d.isoformat()
+    if granularity == "week":
+        return (d - timedelta(days=d.weekday())).isoformat()
+    if granularity == "month":
+        return f"{d.year:04d}-{d.month:02d}"
+    if granularity == "quarter":
+        return f"{d.year:04d}-Q{(d.month + 2) // 3}"
+    if granularity == "year":
+        return f"{d.year:04d}"
+    raise ValueError(f"Unknown time bucket: {granularity}")
+
+
+def _next_bucket(d: date, granularity: str) -> date:
+    if granularity == "day":
+        return d + timedelta(days=1)
+    if granularity == "week":
+        return d - timedelta(days=d.weekday()) + timedelta(days=7)
+    if granularity == "year":
+        return date(d.year + 1, 1, 1)
+    step = 3 if granularity == "quarter" else 1
+    month = (d.month - 1) // step * step + step
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def time_buckets(granularity: str, start: date, end: date) -> Iterator[str]:
+    """Every bucket label touching [start, end], in order."""
+    current = start
+    while current <= end:
+        yield time_bucket(current, granularity)
+        try:
+            current = _next_bucket(current, granularity)
+        except (OverflowError, ValueError):
+            return
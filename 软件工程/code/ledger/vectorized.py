@@ -0,0 +1,75 @@
+"""Optional NumPy group-by engine for StatsService.
+
+NumPy is not a hard dependency: HAS_NUMPY only checks whether it can be
+imported, and the import itself happens on first use so that the CLI does
+not pay for it at start-up. Columns come from a RecordBatch without copying
+(``np.frombuffer`` over its arrays), and sums stay exact in int64 cents.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from datetime import date
+from typing import Any, List, Tuple
+
+from .models import RECORD_TYPES, RecordBatch
+from .utils import TIME_BUCKETS, time_bucket
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+_KEY_COLUMNS = {
+    "date": "dates",
+    **{name: "dates" for name in TIME_BUCKETS},
+    "category": "category_ids",
+    "method": "method_ids",
+}
+
+
+def _numpy():
+    if not HAS_NUMPY:
+        raise RuntimeError("NumPy is not installed; use the SQL stats engine")
+    import numpy
+
+    return numpy
+
+
+def _column(np, column):
+    # array typecodes b/i/q are plain signed integers of their itemsize
+    return np.frombuffer(column, dtype=f"i{column.itemsize}")
+
+
+def totals_by(batch: RecordBatch, group_by: str) -> List[Tuple[Any, int, int]]:
+    """(key, income_cents, expense_cents) per group, like StatsRepository.totals_by()."""
+    if group_by not in _KEY_COLUMNS:
+        raise ValueError(f"Unknown group: {group_by}")
+    np = _numpy()
+    if not len(batch):
+        return []
+    keys = _column(np, getattr(batch, _KEY_COLUMNS[group_by]))
+    amounts = _column(np, batch.amounts)
+    is_income = _column(np, batch.types) == RECORD_TYPES.index("income")
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    sorted_amounts = amounts[order]
+    sorted_income = is_income[order]
+    income = np.add.reduceat(np.where(sorted_income, sorted_amounts, 0), starts)
+    expense = np.add.reduceat(np.where(sorted_income, 0, sorted_amounts), starts)
+
+    group_keys = sorted_keys[starts].tolist()
+    if group_by == "category":
+        group_keys = [k or None for k in group_keys]
+    elif group_by in _KEY_COLUMNS and _KEY_COLUMNS[group_by] == "dates":
+        # Coarser buckets merge runs of consecutive days; there are few days.
+        granularity = "day" if group_by == "date" else group_by
+        merged: List[Tuple[Any, int, int]] = []
+        for ordinal, inc, exp in zip(group_keys, income.tolist(), expense.tolist()):
+            label = time_bucket(date.fromordinal(ordinal), granularity)
+            if merged and merged[-1][0] == label:
+                merged[-1] = (label, merged[-1][1] + inc, merged[-1][2] + exp)
+            else:
+                merged.append((label, inc, exp))
+        return merged
+    return list(zip(group_keys, income.tolist(), expense.tolist()))
+
@@ -0,0 +1,180 @@
+"""Background execution of data-layer calls for the Tkinter GUI.
+
+Tk is single-threaded: callbacks that wait on SQLite freeze the window.
+``BackgroundWorker`` runs submitted calls on a worker thread and queues the
+outcomes; the GUI drains that queue from the Tk thread with ``poll()``
+(scheduled via ``after()``), so success and error callbacks always run on
+the Tk thread. Nothing here imports tkinter.
+
+Jobs submitted with a ``key`` coalesce: a newer job with the same key
+cancels the older one. A queued job is skipped; a running job marked
+``interruptible`` gets ``sqlite3.Connection.interrupt()``. Either way its
+result is dropped. Writes should not be interruptible.
+"""
+
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .database import get_manager
+
+
+class Job:
+    """A submitted call; ``cancel()`` drops its result and may interrupt it."""
+
+    def __init__(
+        self,
+        fn: Callable[..., Any],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        key: Optional[str],
+        on_success: Optional[Callable[[Any], None]],
+        on_error: Optional[Callable[[BaseException], None]],
+        interruptible: bool,
+    ) -> None:
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.on_success = on_success
+        self.on_error = on_error
+        self.interruptible = interruptible
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self.interruptible and self._connection is not None:
+                self._connection.interrupt()
+
+    def start(self, connection: sqlite3.Connection) -> bool:
+        """Mark the job running on ``connection``; False if it was already cancelled."""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._connection = connection
+            return True
+
+    def finish(self) -> None:
+        """Mark the job done; a later cancel() no longer interrupts the connection."""
+        with self._lock:
+            self._connection = None
+
+
+_STOP = object()
+
+
+class BackgroundWorker:
+    """Worker thread(s) plus a result queue drained on the caller's thread.
+
+    One worker (the default) runs jobs in submission order, so a refresh
+    submitted after a write sees that write.
+    """
+
+    def __init__(self, workers: int = 1, db_path: Optional[str] = None) -> None:
+        self._db_path = db_path
+        self._tasks: "queue.Queue[Any]" = queue.Queue()
+        self._results: "queue.Queue[Tuple[Job, bool, Any]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Job] = {}
+        self._outstanding = 0
+        self._threads: List[threading.Thread] = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f"ledger-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        key: Optional[str] = None,
+        on_success: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[BaseException], None]] = None,
+        interruptible: bool = False,
+        **kwargs: Any,
+    ) -> Job:
+        job = Job(fn, args, kwargs, key, on_success, on_error, interruptible)
+        with self._lock:
+            if key is not None:
+                previous = self._latest.get(key)
+                if previous is not None:
+                    previous.cancel()
+                self._latest[key] = job
+            self._outstanding += 1
+        self._tasks.put(job)
+        return job
+
+    def cancel(self, key: str) -> None:
+        with self._lock:
+            job = self._latest.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    @property
+    def busy(self) -> bool:
+        """True while any submitted job has not been delivered by poll()."""
+        return self._outstanding > 0
+
+    def poll(self, limit: int = 50) -> int:
+        """Deliver finished jobs' callbacks on this thread; returns how many ran."""
+        delivered = 0
+        while delivered < limit:
+            try:
+                job, ok, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._outstanding -= 1
+                if job.key is not None and self._latest.get(job.key) is job:
+                    del self._latest[job.key]
+            if job.cancelled:
+                continue
+            delivered += 1
+            callback = job.on_success if ok else job.on_error
+            if callback is not None:
+                callback(value)
+        return delivered
+
+    def shutdown(self, timeout: Optional[float] = 0.0) -> bool:
+        """Cancel outstanding jobs and stop the threads.
+
+        Waits up to ``timeout`` seconds (None: until they finish) for the
+        threads; returns True once all of them have stopped, after which
+        their connections are no longer in use.
+        """
+        with self._lock:
+            jobs = list(self._latest.values())
+            self._latest.clear()
+        for job in jobs:
+            job.cancel()
+        for _ in self._threads:
+            self._tasks.put(_STOP)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0.0))
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def _run(self) -> None:
+        manager = get_manager(self._db_path)
+        while True:
+            job = self._tasks.get()
+            if job is _STOP:
+                return
+            if not job.start(manager.connection()):
+                self._results.put((job, False, None))
+                continue
+            try:
+                value = job.fn(*job.args, **job.kwargs)
+            except BaseException as exc:  # noqa: BLE001 - delivered to on_error
+                self._results.put((job, False, exc))
+            else:
+                self._results.put((job, True, value))
+            finally:
+                job.finish()